@@ -3,13 +3,36 @@ Factory Pollution Analysis System
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import math
+import os
+import time
 from datetime import datetime
 
+from pollution_engine import (PARAMETERS, RECOMMENDATION_BLOCKS, RECOMMENDATION_REPORTS,
+                              PollutionEngine, parse_numeric, recommendation_key)
+from pollution_instrument import INSTRUMENTS
+
+# Stages timed around analyze_environment, in execution order
+GUI_STAGES = ('gui.parse', 'gui.model', 'gui.aqi_risk', 'gui.recommendations', 'gui.render',
+              'gui.store')
+
+# Results database opened by main() when set; analyses are appended to it
+STORE_ENV = 'POLLUTION_STORE'
+
 class AdvancedFactoryAnalyzer:
-    def __init__(self, master):
+    # Quiet period after the last keystroke before a live re-analysis runs
+    LIVE_DELAY_MS = 300
+    
+    def __init__(self, master, store=None, plant="gui"):
         self.master = master
+        self.engine = PollutionEngine()
+        self.store = store
+        self.plant = plant
+        self._live_job = None
+        self._rec_key = None
+        self._rec_blocks = [self._line_segments(lines) for _, lines in RECOMMENDATION_BLOCKS]
+        self._last_analysis = None
         master.title("Industrial Environmental Analysis Platform")
         master.geometry("950x800")
         master.configure(bg='#f5f7fa')
@@ -42,18 +65,7 @@ class AdvancedFactoryAnalyzer:
         input_title.pack(fill='x')
         
         
-        self.parameters = [
-            ("Production Volume (tons/day)", "production", 0, 10000),
-            ("Furnace Temperature (°C)", "temperature", 0, 2000),
-            ("Fuel Consumption (liters)", "fuel", 0, 5000),
-            ("Material Quality Index", "quality", 0, 100),
-            ("Process Efficiency (%)", "efficiency", 0, 100),
-            ("Operating Hours", "hours", 0, 24),
-            ("Equipment Age (years)", "age", 0, 50),
-            ("Staff Experience Level", "experience", 1, 10),
-            ("Maintenance Status", "maintenance", 0, 1),
-            ("Ambient Humidity (%)", "humidity", 0, 100)
-        ]
+        self.parameters = PARAMETERS
         
         self.entries = {}
         
@@ -74,6 +86,7 @@ class AdvancedFactoryAnalyzer:
             entry.bind('<Return>', lambda e, idx=i: self.navigate_fields(idx, 1))
             entry.bind('<Up>', lambda e, idx=i: self.navigate_fields(idx, -1))
             entry.bind('<Down>', lambda e, idx=i: self.navigate_fields(idx, 1))
+            entry.bind('<KeyRelease>', self.schedule_live_analysis, add='+')
             
             self.entries[key] = entry
         
@@ -95,6 +108,11 @@ class AdvancedFactoryAnalyzer:
                  bg='#3498db', fg='white', font=('Segoe UI', 9),
                  padx=15, pady=5).pack(side='left', padx=5)
         
+        self.live_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Live Analysis", variable=self.live_var,
+                       command=self.schedule_live_analysis, bg='white',
+                       font=('Segoe UI', 9)).pack(side='left', padx=5)
+        
         
         right_panel = tk.Frame(content_frame, bg='white', relief='solid', bd=1)
         right_panel.pack(side='right', fill='both', expand=True)
@@ -143,6 +161,10 @@ class AdvancedFactoryAnalyzer:
                                font=('Segoe UI', 9), wrap='word',
                                bg='#f8f9fa', relief='solid', bd=1)
         self.rec_text.pack(fill='both', expand=True, padx=15, pady=(0, 15))
+        self.rec_text.tag_configure('header', font=('Segoe UI', 9, 'bold'), 
+                                   foreground='#2c3e50')
+        self.rec_text.tag_configure('subheader', font=('Segoe UI', 9, 'bold'),
+                                   foreground='#27ae60')
         
         
         self.status = tk.Label(master, text="System Ready | Enter operational parameters above", 
@@ -163,6 +185,9 @@ class AdvancedFactoryAnalyzer:
     
     def clear_all(self):
         """Clear all input fields"""
+        self.cancel_live_analysis()
+        self._rec_key = None
+        self._last_analysis = None
         for entry in self.entries.values():
             entry.delete(0, 'end')
         
@@ -175,256 +200,226 @@ class AdvancedFactoryAnalyzer:
     
     def get_numeric_value(self, entry):
         """Safely convert entry to float"""
-        try:
-            value = float(entry.get())
-            return max(0, value)  # Ensure non-negative
-        except:
-            return 0.0
+        return parse_numeric(entry.get())
+    
+    def schedule_live_analysis(self, event=None):
+        """Debounce live re-analysis until typing pauses"""
+        self.cancel_live_analysis()
+        if self.live_var.get():
+            self._live_job = self.master.after(self.LIVE_DELAY_MS, self._run_live_analysis)
+    
+    def cancel_live_analysis(self):
+        """Drop any pending live re-analysis"""
+        if self._live_job is not None:
+            self.master.after_cancel(self._live_job)
+            self._live_job = None
     
-    def analyze_environment(self):
-        """Comprehensive environmental analysis with GAN-inspired solutions"""
+    def _run_live_analysis(self):
+        self._live_job = None
+        if any(entry.get().strip() for entry in self.entries.values()):
+            self.analyze_environment(live=True)
+    
+    def _set_result(self, name, text):
+        var = self.results[name]
+        if var.get() != text:
+            var.set(text)
+    
+    def analyze_environment(self, live=False):
+        """Comprehensive environmental analysis with GAN-inspired solutions
+        
+        Only results whose text changed are pushed to the widgets, and the
+        recommendation panel is left alone while its condition set is the same.
+        """
         try:
             
-            values = {}
-            for key, entry in self.entries.items():
-                values[key] = self.get_numeric_value(entry)
+            with INSTRUMENTS.stage('gui.parse'):
+                values = {}
+                for key, entry in self.entries.items():
+                    values[key] = self.get_numeric_value(entry)
             
             
-            pollution_data = self.calculate_pollution(values)
+            with INSTRUMENTS.stage('gui.model'):
+                pollution_data = self.calculate_pollution(values)
             
             
-            self.results["PM2.5 Concentration"].set(f"{pollution_data['pm25']:.1f} μg/m³")
-            self.results["SO₂ Emissions"].set(f"{pollution_data['so2']:.2f} ppm")
-            self.results["NOx Levels"].set(f"{pollution_data['nox']:.2f} ppm")
-            self.results["CO Output"].set(f"{pollution_data['co']:.2f} ppm")
-            
-            
-            aqi = self.calculate_aqi(pollution_data)
-            self.results["Overall Air Quality"].set(f"{aqi} AQI")
+            with INSTRUMENTS.stage('gui.aqi_risk'):
+                aqi = self.calculate_aqi(pollution_data)
+                risk_level, risk_color = self.assess_risk(aqi, pollution_data)
+            self._last_analysis = (pollution_data, aqi, self.engine.risk_code(aqi))
             
+            # Generate GAN
+            with INSTRUMENTS.stage('gui.recommendations'):
+                rec_key = recommendation_key(values, pollution_data, aqi)
             
-            risk_level, risk_color = self.assess_risk(aqi, pollution_data)
-            self.risk_label.config(text=f"RISK LEVEL: {risk_level}", fg=risk_color)
             
-            # Generate GAN
-            recommendations = self.generate_recommendations(values, pollution_data, aqi)
-            self.display_recommendations(recommendations)
+            with INSTRUMENTS.stage('gui.render'):
+                self._set_result("PM2.5 Concentration", f"{pollution_data['pm25']:.1f} μg/m³")
+                self._set_result("SO₂ Emissions", f"{pollution_data['so2']:.2f} ppm")
+                self._set_result("NOx Levels", f"{pollution_data['nox']:.2f} ppm")
+                self._set_result("CO Output", f"{pollution_data['co']:.2f} ppm")
+                self._set_result("Overall Air Quality", f"{aqi} AQI")
+                
+                risk_text = f"RISK LEVEL: {risk_level}"
+                if self.risk_label.cget('text') != risk_text:
+                    self.risk_label.config(text=risk_text, fg=risk_color)
+                
+                if rec_key != self._rec_key:
+                    self.display_recommendations(RECOMMENDATION_REPORTS[rec_key], rec_key)
+                    INSTRUMENTS.count('gui.rec_redraws')
+            INSTRUMENTS.count('gui.analyses')
             
-            self.status.config(text=f"Analysis Complete | AQI: {aqi} | Risk: {risk_level}")
+            mode = "Live Analysis" if live else "Analysis Complete"
+            status = f"{mode} | AQI: {aqi} | Risk: {risk_level}"
+            if self.store is not None and not live:
+                with INSTRUMENTS.stage('gui.store'):
+                    status += self.store_analysis(values, pollution_data, aqi)
+            if INSTRUMENTS.enabled:
+                status += f" | {INSTRUMENTS.summary(GUI_STAGES)}"
+            self.status.config(text=status)
             
         except Exception as e:
-            messagebox.showerror("Analysis Error", f"Please check input values\n{str(e)}")
+            if live:
+                self.status.config(text=f"Live Analysis Error | {e}")
+            else:
+                messagebox.showerror("Analysis Error", f"Please check input values\n{str(e)}")
+    
+    def store_analysis(self, values, pollution, aqi):
+        """Append one analysis to the results store; returns a status suffix"""
+        try:
+            self.store.append(self.plant, [time.time()],
+                              {name: [value] for name, value in pollution.items()},
+                              [aqi], [self.engine.risk_code(aqi)],
+                              {key: [value] for key, value in values.items()})
+            return " | Saved"
+        except Exception as e:
+            return f" | Not saved: {e}"
     
     def calculate_pollution(self, values):
         """Advanced pollution modeling"""
-        
-        pm25_base = 15.0
-        so2_base = 8.0
-        nox_base = 12.0
-        co_base = 6.0
-        
-        
-        production_factor = values['production'] / 1000
-        
-        
-        temp = values['temperature']
-        temp_factor = 1.0 + max(0, temp - 1200) * 0.001
-        
-        
-        fuel_factor = values['fuel'] * 0.0005
-        
-        
-        efficiency_benefit = (100 - values['efficiency']) * 0.01
-        
-        
-        maintenance_impact = 0.7 if values['maintenance'] > 0.5 else 1.0
-        
-        
-        exp_benefit = max(0.7, 1.0 - (values['experience'] * 0.03))
-        
-        # Cp
-        pm25 = (pm25_base + production_factor * 10 + temp_factor * 5 + 
-                fuel_factor * 3) * efficiency_benefit * maintenance_impact * exp_benefit
-        
-        so2 = (so2_base + fuel_factor * 8 + production_factor * 4) * maintenance_impact
-        
-        nox = (nox_base + temp_factor * 6 + production_factor * 5) * exp_benefit
-        
-        co = (co_base + fuel_factor * 6 - values['quality'] * 0.05) * maintenance_impact
-        
-        return {
-            'pm25': max(0, pm25),
-            'so2': max(0, so2),
-            'nox': max(0, nox),
-            'co': max(0, co)
-        }
+        return self.engine.calculate_pollution(values)
     
     def calculate_aqi(self, pollution):
         """Calculate Air Quality Index"""
-        # Wa
-        aqi = (pollution['pm25'] * 0.35 + 
-               pollution['so2'] * 20 * 0.25 + 
-               pollution['nox'] * 15 * 0.25 + 
-               pollution['co'] * 10 * 0.15)
-        
-        return int(max(0, min(500, aqi)))
+        return self.engine.calculate_aqi(pollution)
     
     def assess_risk(self, aqi, pollution):
         """Risk assessment with color coding"""
-        if aqi < 50:
-            return "LOW", "#27ae60"
-        elif aqi < 100:
-            return "MODERATE", "#f39c12"
-        elif aqi < 150:
-            return "UNHEALTHY", "#e67e22"
-        elif aqi < 200:
-            return "VERY UNHEALTHY", "#e74c3c"
-        else:
-            return "HAZARDOUS", "#8b0000"
+        return self.engine.assess_risk(aqi, pollution)
     
     def generate_recommendations(self, values, pollution, aqi):
         """Generate comprehensive, creative recommendations using GAN-inspired approach"""
-        recommendations = []
-        
-        
-        recommendations.append("=" * 60)
-        recommendations.append("GENERATIVE ENHANCEMENT STRATEGIES")
-        recommendations.append("=" * 60)
-        recommendations.append("")
-        
-        
-        recommendations.append("🏗️  SMART GREEN INFRASTRUCTURE:")
-        recommendations.append("  • Deploy AI-optimized vertical gardens on factory walls")
-        recommendations.append("  • Install modular green roof systems with IoT monitoring")
-        recommendations.append("  • Create micro-forest zones around perimeter using native species")
-        recommendations.append("  • Implement rainwater harvesting with automated irrigation")
-        recommendations.append("")
-        
-        
-        recommendations.append("🌬️  INNOVATIVE AIR PURIFICATION:")
-        recommendations.append("  • Install electrostatic precipitators with HEPA-14 filters")
-        recommendations.append("  • Deploy photocatalytic oxidation units near emission sources")
-        recommendations.append("  • Use bio-filtration with engineered microbial communities")
-        recommendations.append("  • Implement atmospheric water generators for humidity control")
-        recommendations.append("")
-        
-        
-        if values['fuel'] > 1000:
-            recommendations.append("⚡ ENERGY TRANSFORMATION PATH:")
-            recommendations.append("  • Phase 1: Convert 30% to biomass gasification")
-            recommendations.append("  • Phase 2: Install onsite solar micro-grid (500kW)")
-            recommendations.append("  • Phase 3: Implement waste-heat recovery systems")
-            recommendations.append("  • Phase 4: Deploy hydrogen fuel cell backup")
-            recommendations.append("")
-        
-        
-        recommendations.append("🔧 OPERATIONAL ENHANCEMENTS:")
-        
-        if values['efficiency'] < 85:
-            recommendations.append("  • Upgrade to Industry 4.0 automation systems")
-            recommendations.append("  • Implement predictive maintenance using ML algorithms")
-            recommendations.append("  • Optimize thermal efficiency with ceramic coatings")
-        
-        if values['quality'] < 80:
-            recommendations.append("  • Establish real-time material quality monitoring")
-            recommendations.append("  • Implement closed-loop material recycling system")
-            recommendations.append("  • Develop supplier sustainability scoring")
-        
-        if values['maintenance'] < 0.5:
-            recommendations.append("  • Schedule mandatory maintenance every 3 months")
-            recommendations.append("  • Create digital twin for equipment health monitoring")
-        
-        recommendations.append("")
-        
-        
-        recommendations.append("🌿 ECOLOGICAL SYNERGY PROJECTS:")
-        recommendations.append("  • Create pollinator habitats with native flowering plants")
-        recommendations.append("  • Establish mycoremediation zones for soil detoxification")
-        recommendations.append("  • Install bird/bat houses for natural pest control")
-        recommendations.append("  • Develop educational eco-trail for community engagement")
-        recommendations.append("")
-        
-        
-        if pollution['co'] > 5 or aqi > 100:
-            recommendations.append("♻️ CARBON MANAGEMENT SOLUTIONS:")
-            recommendations.append("  • Install direct air capture units in high-emission areas")
-            recommendations.append("  • Create algae photobioreactors for CO₂ sequestration")
-            recommendations.append("  • Implement blockchain-based carbon credit tracking")
-            recommendations.append("  • Develop circular economy partnerships")
-            recommendations.append("")
-        
-        
-        recommendations.append("👥 WORKFORCE WELLBEING PROGRAM:")
-        recommendations.append("  • Establish indoor air quality monitoring in all work areas")
-        recommendations.append("  • Create green break areas with living walls")
-        recommendations.append("  • Implement mandatory environmental training")
-        recommendations.append("  • Develop incentive programs for green innovation")
-        recommendations.append("")
-        
-        
-        recommendations.append("🤝 COMMUNITY COLLABORATION:")
-        recommendations.append("  • Sponsor urban reforestation in adjacent neighborhoods")
-        recommendations.append("  • Create joint air quality monitoring network")
-        recommendations.append("  • Establish community garden with excess rainwater")
-        recommendations.append("  • Develop transparency portal for environmental metrics")
-        recommendations.append("")
-        
-        
-        recommendations.append("📊 INTELLIGENT MONITORING SYSTEM:")
-        recommendations.append("  • Deploy network of IoT air quality sensors")
-        recommendations.append("  • Implement real-time emissions dashboard")
-        recommendations.append("  • Use satellite imagery for environmental impact assessment")
-        recommendations.append("  • Create predictive analytics for pollution forecasting")
-        recommendations.append("")
-        
-        
-        recommendations.append("🚀 LONG-TERM INNOVATION PATH:")
-        recommendations.append("  • Year 1: Baseline assessment & pilot projects")
-        recommendations.append("  • Year 2: Technology deployment & optimization")
-        recommendations.append("  • Year 3: Scaling successful initiatives")
-        recommendations.append("  • Year 5: Net-zero emissions target")
-        recommendations.append("")
-        
-       
-        recommendations.append("💰 FINANCIAL CONSIDERATIONS:")
-        recommendations.append("  • Estimated ROI: 3-5 years through efficiency gains")
-        recommendations.append("  • Available government incentives for green technology")
-        recommendations.append("  • Potential carbon credit revenue: $50K-$200K annually")
-        recommendations.append("  • Insurance premium reduction: 15-25% possible")
-        recommendations.append("")
-        
-        
-        recommendations.append("📅 RECOMMENDED IMPLEMENTATION:")
-        recommendations.append("  • Immediate (1 month): Employee training & baseline audit")
-        recommendations.append("  • Short-term (3 months): Quick-win green infrastructure")
-        recommendations.append("  • Medium-term (12 months): Major technology deployment")
-        recommendations.append("  • Long-term (24+ months): Full transformation")
-        
-        return recommendations
+        return self.engine.generate_recommendations(values, pollution, aqi)
     
-    def display_recommendations(self, recommendations):
-        """Display recommendations in text widget"""
-        self.rec_text.delete(1.0, 'end')
-        
-        for line in recommendations:
-            
+    @staticmethod
+    def _line_segments(lines):
+        """Text.insert arguments for lines, tagged as header, subheader or plain"""
+        segments = []
+        for line in lines:
             if "=" in line:
-                self.rec_text.insert('end', line + '\n', 'header')
+                segments.extend((line + '\n', 'header'))
             elif line.strip().endswith(":"):
-                self.rec_text.insert('end', line + '\n', 'subheader')
+                segments.extend((line + '\n', 'subheader'))
             else:
-                self.rec_text.insert('end', line + '\n')
-        
-        
-        self.rec_text.tag_configure('header', font=('Segoe UI', 9, 'bold'), 
-                                   foreground='#2c3e50')
-        self.rec_text.tag_configure('subheader', font=('Segoe UI', 9, 'bold'),
-                                   foreground='#27ae60')
+                segments.extend((line + '\n', ()))
+        return segments
+    
+    def display_recommendations(self, recommendations, key=None):
+        """Display recommendations in text widget
+        
+        With a recommendation key, each block of RECOMMENDATION_BLOCKS starts
+        at a left-gravity mark 'rec<i>', and a change of key only inserts or
+        deletes the optional blocks whose bit flipped. Without a key, or
+        after clear_all, the text is redrawn in full.
+        """
+        if key is None:
+            self.rec_text.delete(1.0, 'end')
+            segments = self._line_segments(recommendations)
+            if segments:
+                self.rec_text.insert('end', *segments)
+        elif self._rec_key is None:
+            self.rec_text.delete(1.0, 'end')
+            for i, (bit, _) in enumerate(RECOMMENDATION_BLOCKS):
+                mark = f'rec{i}'
+                self.rec_text.mark_set(mark, 'end-1c')
+                self.rec_text.mark_gravity(mark, 'left')
+                if not bit or key & bit:
+                    self.rec_text.insert('end', *self._rec_blocks[i])
+        else:
+            changed = key ^ self._rec_key
+            for i, (bit, _) in enumerate(RECOMMENDATION_BLOCKS):
+                if bit & changed:
+                    if key & bit:
+                        self._insert_rec_block(i)
+                    else:
+                        end = f'rec{i + 1}' if i + 1 < len(RECOMMENDATION_BLOCKS) else 'end-1c'
+                        self.rec_text.delete(f'rec{i}', end)
+        self._rec_key = key
+    
+    def _insert_rec_block(self, i):
+        """Insert block i at its mark, keeping the marks of later empty blocks after it"""
+        start = f'rec{i}'
+        following = []
+        for j in range(i + 1, len(RECOMMENDATION_BLOCKS)):
+            if not self.rec_text.compare(f'rec{j}', '==', start):
+                break
+            following.append(f'rec{j}')
+        # Right gravity carries the marks sharing the insertion point past the new text
+        for mark in following:
+            self.rec_text.mark_gravity(mark, 'right')
+        self.rec_text.insert(start, *self._rec_blocks[i])
+        for mark in following:
+            self.rec_text.mark_gravity(mark, 'left')
+    
+    def toggle_instrumentation(self):
+        """Switch per-stage timing of analyses on or off"""
+        if INSTRUMENTS.enabled:
+            INSTRUMENTS.disable()
+            self.status.config(text="Instrumentation off | Ctrl+M saves the collected metrics")
+        else:
+            INSTRUMENTS.reset()
+            INSTRUMENTS.enable()
+            self.status.config(text="Instrumentation on | Stage timings shown after each analysis")
+    
+    def dump_metrics(self):
+        """Save a JSON snapshot of the collected stage timings"""
+        path = filedialog.asksaveasfilename(
+            title="Save Metrics Snapshot", defaultextension=".json",
+            initialfile=f"pollution_metrics_{datetime.now():%Y%m%d_%H%M%S}.json",
+            filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            INSTRUMENTS.dump(path)
+            self.status.config(text=f"Metrics saved | {path}")
+        except OSError as e:
+            messagebox.showerror("Metrics Error", f"Could not save metrics\n{str(e)}")
     
     def export_report(self):
-        """Export analysis report"""
-        # Implementation for report generation
-        messagebox.showinfo("Export", "Report generation feature would be implemented here.\n\nThis would include:\n- PDF generation\n- Data visualization\n- Executive summary\n- Technical specifications\n- Implementation roadmap")
+        """Export the current analysis as CSV, JSONL or NumPy .npz"""
+        if self._last_analysis is None:
+            messagebox.showinfo("Export", "Run an environmental analysis before exporting.")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Export Analysis", defaultextension=".csv",
+            initialfile=f"pollution_analysis_{datetime.now():%Y%m%d_%H%M%S}.csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("NumPy archive", "*.npz")])
+        if not path:
+            return
+        
+        try:
+            import numpy as np
+            from pollution_export import detect_output_format, open_result_writer
+            
+            pollution, aqi, code = self._last_analysis
+            columns = {name: np.array([value], dtype=np.float64)
+                       for name, value in pollution.items()}
+            with open_result_writer(path, detect_output_format(path)) as writer:
+                writer.write_chunk(0, columns, np.array([aqi], dtype=np.int16),
+                                   np.array([code], dtype=np.uint8))
+            self.status.config(text=f"Report exported | {path}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Could not export report\n{str(e)}")
 
 def main():
     root = tk.Tk()
@@ -443,14 +438,23 @@ def main():
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
     
-    app = AdvancedFactoryAnalyzer(root)
+    store = None
+    if os.environ.get(STORE_ENV):
+        from pollution_store import ResultStore
+        store = ResultStore(os.environ[STORE_ENV])
+    
+    app = AdvancedFactoryAnalyzer(root, store)
     
     # میانبر های صفحه کلید
     root.bind('<Control-Enter>', lambda e: app.analyze_environment())
     root.bind('<Control-e>', lambda e: app.export_report())
     root.bind('<Control-c>', lambda e: app.clear_all())
+    root.bind('<Control-i>', lambda e: app.toggle_instrumentation())
+    root.bind('<Control-m>', lambda e: app.dump_metrics())
     
     root.mainloop()
+    if store is not None:
+        store.close()
 
 if __name__ == "__main__":
     main()
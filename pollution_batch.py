@@ -0,0 +1,202 @@
+"""
+Vectorized Batch Scoring
+
+NumPy implementation of the pollution model for columnar fleet data.
+Every function mirrors its scalar counterpart on PollutionEngine and
+evaluates whole arrays in one pass without building a dict per row.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from pollution_engine import (PARAMETER_KEYS, POLLUTANTS, REC_CARBON, REC_HIGH_FUEL, REC_LOW_EFFICIENCY,
+                              REC_LOW_QUALITY, REC_POOR_MAINTENANCE, RISK_BREAKPOINTS,
+                              RISK_LEVELS)
+from pollution_instrument import INSTRUMENTS
+from pollution_profiles import DEFAULT_PROFILE
+
+# Lookup tables mapping risk codes (uint8) back to labels and colors
+RISK_LABELS = np.array([label for label, _ in RISK_LEVELS])
+RISK_COLORS = np.array([color for _, color in RISK_LEVELS])
+
+_RISK_BREAKPOINTS = np.array(RISK_BREAKPOINTS, dtype=np.int16)
+
+# Compact bulk record layouts; float32 keeps ~7 significant digits, which
+# covers every PARAMETERS range and the reported pollutant precision
+READING_DTYPE = np.dtype([(key, np.float32) for key in PARAMETER_KEYS])
+
+RESULT_DTYPE = np.dtype([(name, np.float32) for name in POLLUTANTS] +
+                        [('aqi', np.int16), ('risk', np.uint8)])
+
+
+def as_columns(data):
+    """Normalize columns, an (n, 10) matrix or a READING_DTYPE array to float64 columns"""
+    if isinstance(data, np.ndarray) and data.dtype.names:
+        return {key: data[key].astype(np.float64) for key in PARAMETER_KEYS}
+
+    if isinstance(data, np.ndarray) and data.ndim == 2:
+        if data.shape[1] != len(PARAMETER_KEYS):
+            raise ValueError(f"Expected {len(PARAMETER_KEYS)} columns, got {data.shape[1]}")
+        return {key: np.ascontiguousarray(data[:, i], dtype=np.float64)
+                for i, key in enumerate(PARAMETER_KEYS)}
+
+    missing = [key for key in PARAMETER_KEYS if key not in data]
+    if missing:
+        raise KeyError(f"Missing parameter columns: {', '.join(missing)}")
+    return {key: np.asarray(data[key], dtype=np.float64) for key in PARAMETER_KEYS}
+
+
+# Per-row terms of the pollution model: the six multiplicative factors and
+# each pollutant's sum of source terms before those factors are applied
+ModelTerms = namedtuple('ModelTerms', (
+    'production_factor', 'temp_factor', 'fuel_factor', 'efficiency_benefit',
+    'maintenance_impact', 'exp_benefit', 'pm25_sum', 'so2_sum', 'nox_sum', 'co_sum'))
+
+
+def model_terms_batch(columns, profile=None):
+    """Intermediate factors and source sums of the pollution model as ModelTerms arrays
+
+    Shared by calculate_pollution_batch and the analytic sensitivities so
+    the forward model is written once for arrays.
+    """
+    columns = as_columns(columns)
+    c = (profile or DEFAULT_PROFILE).coefficients
+
+    production_factor = columns['production'] / c.production_scale
+
+    temp_factor = 1.0 + (np.maximum(0, columns['temperature'] - c.temperature_knee) *
+                         c.temperature_slope)
+
+    fuel_factor = columns['fuel'] * c.fuel_factor
+
+    efficiency_benefit = (100 - columns['efficiency']) * c.efficiency_scale
+
+    maintenance_impact = np.where(columns['maintenance'] > c.maintenance_threshold,
+                                  c.maintenance_impact, 1.0)
+
+    exp_benefit = np.maximum(c.experience_floor, 1.0 - (columns['experience'] * c.experience_slope))
+
+    return ModelTerms(
+        production_factor, temp_factor, fuel_factor, efficiency_benefit,
+        maintenance_impact, exp_benefit,
+        pm25_sum=(c.base_pm25 + production_factor * c.production_pm25 +
+                  temp_factor * c.temperature_pm25 + fuel_factor * c.fuel_pm25),
+        so2_sum=c.base_so2 + fuel_factor * c.fuel_so2 + production_factor * c.production_so2,
+        nox_sum=c.base_nox + temp_factor * c.temperature_nox + production_factor * c.production_nox,
+        co_sum=c.base_co + fuel_factor * c.fuel_co - columns['quality'] * c.quality_co)
+
+
+def calculate_pollution_batch(columns, profile=None):
+    """Vectorized calculate_pollution returning PM2.5/SO2/NOx/CO arrays"""
+    t = model_terms_batch(columns, profile)
+
+    pm25 = t.pm25_sum * t.efficiency_benefit * t.maintenance_impact * t.exp_benefit
+
+    so2 = t.so2_sum * t.maintenance_impact
+
+    nox = t.nox_sum * t.exp_benefit
+
+    co = t.co_sum * t.maintenance_impact
+
+    return {
+        'pm25': np.maximum(0, pm25),
+        'so2': np.maximum(0, so2),
+        'nox': np.maximum(0, nox),
+        'co': np.maximum(0, co)
+    }
+
+
+def calculate_aqi_batch(pollution, profile=None):
+    """Vectorized calculate_aqi returning an int16 AQI array"""
+    return aqi_raw_batch(pollution, profile).astype(np.int16)
+
+
+def aqi_raw_batch(pollution, profile=None):
+    """Continuous AQI clipped to 0..500, before truncation to an integer"""
+    (scale_pm25, scale_so2, scale_nox, scale_co,
+     weight_pm25, weight_so2, weight_nox, weight_co) = (profile or DEFAULT_PROFILE).aqi_factors
+    aqi = (np.asarray(pollution['pm25']) * scale_pm25 * weight_pm25 +
+           np.asarray(pollution['so2']) * scale_so2 * weight_so2 +
+           np.asarray(pollution['nox']) * scale_nox * weight_nox +
+           np.asarray(pollution['co']) * scale_co * weight_co)
+    return np.clip(aqi, 0, 500)
+
+
+def assess_risk_batch(aqi):
+    """Vectorized risk classification returning uint8 codes into RISK_LEVELS"""
+    aqi = np.asarray(aqi, dtype=np.int16)
+    return np.searchsorted(_RISK_BREAKPOINTS, aqi, side='right').astype(np.uint8)
+
+
+def score_batch(columns, profile=None):
+    """Run pollution, AQI and risk classification over columnar input"""
+    with INSTRUMENTS.stage('batch.pollution'):
+        pollution = calculate_pollution_batch(columns, profile)
+    with INSTRUMENTS.stage('batch.aqi_risk'):
+        aqi = calculate_aqi_batch(pollution, profile)
+        risk = assess_risk_batch(aqi)
+    return pollution, aqi, risk
+
+
+def score_fleet_batch(columns, profile_ids, profiles):
+    """score_batch for a fleet whose rows use different emission-factor profiles
+
+    profile_ids gives each row's key into profiles (a mapping or sequence
+    of EmissionProfile). Rows are grouped per profile with one stable sort,
+    each group is scored with its profile's coefficients, and results are
+    scattered back into input order.
+    """
+    columns = as_columns(columns)
+    ids, inverse = np.unique(np.asarray(profile_ids), return_inverse=True)
+    rows = len(inverse)
+    group_profiles = []
+    for key in ids.tolist():
+        try:
+            group_profiles.append(profiles[key])
+        except (KeyError, IndexError):
+            raise KeyError(f"Unknown profile: {key!r}") from None
+
+    pollution = {name: np.empty(rows) for name in POLLUTANTS}
+    aqi = np.empty(rows, dtype=np.int16)
+    risk = np.empty(rows, dtype=np.uint8)
+
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(ids)))
+    start = 0
+    for profile, end in zip(group_profiles, bounds.tolist()):
+        index = order[start:end]
+        start = end
+        subset = {name: values[index] for name, values in columns.items()}
+        group_pollution, group_aqi, group_risk = score_batch(subset, profile)
+        aqi[index] = group_aqi
+        risk[index] = group_risk
+        for name in POLLUTANTS:
+            pollution[name][index] = group_pollution[name]
+    return pollution, aqi, risk
+
+
+def recommendation_keys_batch(columns, pollution, aqi):
+    """Vectorized recommendation_key returning uint8 keys into RECOMMENDATION_REPORTS"""
+    columns = as_columns(columns)
+    keys = (columns['fuel'] > 1000) * REC_HIGH_FUEL
+    keys |= (columns['efficiency'] < 85) * REC_LOW_EFFICIENCY
+    keys |= (columns['quality'] < 80) * REC_LOW_QUALITY
+    keys |= (columns['maintenance'] < 0.5) * REC_POOR_MAINTENANCE
+    keys |= ((np.asarray(pollution['co']) > 5) | (np.asarray(aqi) > 100)) * REC_CARBON
+    return keys.astype(np.uint8)
+
+
+def score_records(readings, profile=None):
+    """Score a READING_DTYPE array into a RESULT_DTYPE array
+
+    Arithmetic runs in float64 like the scalar engine; only storage is
+    narrowed to float32.
+    """
+    pollution, aqi, risk = score_batch(readings, profile)
+    results = np.empty(len(aqi), dtype=RESULT_DTYPE)
+    for name in POLLUTANTS:
+        results[name] = pollution[name]
+    results['aqi'] = aqi
+    results['risk'] = risk
+    return results
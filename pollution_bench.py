@@ -0,0 +1,343 @@
+"""
+Pollution Model Benchmarks
+
+Reproducible benchmark suite and regression harness for the model hot
+paths: single-call latency of the engine methods, batch throughput and
+peak memory at increasing row counts, and the Tk time of incremental
+recommendation-panel redraws when a display is available. Inputs are
+drawn from a seeded generator within the bounds declared in PARAMETERS.
+
+Timings are best-of-N samples of at least MIN_SAMPLE_S each, and every
+sample is also expressed in units of a reference loop timed around it, so
+baseline comparisons track the code rather than the machine's current
+speed. A metric regresses only when it is worse than tolerance plus its
+measured noise, and still is after the suite is re-run to confirm.
+
+    python pollution_bench.py -o bench.json
+    python pollution_bench.py --sizes 1000,1000000 --baseline bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+
+import numpy as np
+
+from pollution_batch import recommendation_keys_batch, score_batch
+from pollution_engine import PARAMETERS, RECOMMENDATION_REPORTS, PollutionEngine
+
+DEFAULT_SIZES = (1000, 1000000, 10000000)
+
+# Rows generated and scored per block in throughput runs
+BLOCK_ROWS = 1000000
+
+# Relative change beyond which a metric counts as a regression, on top of its measured noise
+DEFAULT_TOLERANCE = 0.10
+
+# Shortest timed sample; faster workloads are looped until one sample takes this long
+MIN_SAMPLE_S = 0.05
+
+# Timed samples per metric; the best is reported and the spread estimates noise
+DEFAULT_REPEAT = 7
+
+# Extra suite runs a regression must survive before --baseline fails
+DEFAULT_CONFIRM_RUNS = 2
+
+# Iterations of the reference loop that time metrics are normalized by
+REFERENCE_LOOPS = 10000
+
+
+def synthetic_columns(rows, seed=0):
+    """Uniform random parameter columns within the PARAMETERS bounds"""
+    rng = np.random.default_rng(seed)
+    return {key: rng.uniform(low, high, rows) for _, key, low, high in PARAMETERS}
+
+
+def synthetic_values(count, seed=0):
+    """List of per-call value dicts drawn like synthetic_columns"""
+    columns = synthetic_columns(count, seed)
+    return [{key: float(column[i]) for key, column in columns.items()}
+            for i in range(count)]
+
+
+def _metric(value, unit, better, noise=0.0, relative=None):
+    metric = {'value': value, 'unit': unit, 'better': better, 'noise': noise}
+    if relative is not None:
+        metric['relative'] = relative
+    return metric
+
+
+def _reference_loop():
+    """Fixed pure-Python workload timed around every sample"""
+    total = 0
+    for i in range(REFERENCE_LOOPS):
+        total += i * i % 7
+    return total
+
+
+def _loops(timer):
+    """Calls per sample so that one sample lasts at least MIN_SAMPLE_S"""
+    number = 1
+    while timer.timeit(number) < MIN_SAMPLE_S:
+        number *= 2
+    return number
+
+
+def _best_of(run, repeat):
+    """(best seconds per run() call, relative noise, best time in reference units)
+
+    Each sample loops run() until it lasts at least MIN_SAMPLE_S and is
+    divided by the mean of reference-loop timings taken just before and
+    after it, which cancels drift in machine speed between and within runs.
+    Noise is the median ratio's excess over the best one.
+    """
+    timer = timeit.Timer(run)
+    reference = timeit.Timer(_reference_loop)
+    number = _loops(timer)
+    reference_number = _loops(reference)
+    samples = []
+    ratios = []
+    for _ in range(repeat):
+        before = reference.timeit(reference_number)
+        sample = timer.timeit(number) / number
+        after = reference.timeit(reference_number)
+        samples.append(sample)
+        ratios.append(sample / ((before + after) / 2 / reference_number))
+    ratios.sort()
+    median = ratios[len(ratios) // 2]
+    quartile = len(ratios) // 4
+    return min(samples), (ratios[-1 - quartile] - ratios[quartile]) / median, median
+
+
+def _per_call(func, args_list, repeat):
+    """(best mean time per call in nanoseconds, relative noise, reference units per call)"""
+    def run():
+        for args in args_list:
+            func(*args)
+    best, noise, relative = _best_of(run, repeat)
+    return best / len(args_list) * 1e9, noise, relative / len(args_list)
+
+
+def bench_latency(samples=2000, repeat=DEFAULT_REPEAT, seed=0):
+    """Single-call latency of the scalar engine methods"""
+    engine = PollutionEngine()
+    values = synthetic_values(samples, seed)
+    pollution = [engine.calculate_pollution(v) for v in values]
+    aqi = [engine.calculate_aqi(p) for p in pollution]
+
+    calls = {
+        'calculate_pollution': (engine.calculate_pollution, [(v,) for v in values]),
+        'calculate_aqi': (engine.calculate_aqi, [(p,) for p in pollution]),
+        'assess_risk': (engine.assess_risk, list(zip(aqi, pollution))),
+        'generate_recommendations': (engine.generate_recommendations,
+                                     list(zip(values, pollution, aqi)))
+    }
+    results = {}
+    for name, (func, args_list) in calls.items():
+        best, noise, relative = _per_call(func, args_list, repeat)
+        results[f'latency.{name}'] = _metric(best, 'ns', 'lower', noise, relative)
+    return results
+
+
+def bench_batch(rows, seed=0, repeat=DEFAULT_REPEAT):
+    """Best-of-repeat throughput and peak traced memory of score_batch over `rows` rows
+
+    Peak memory comes from one separate traced run per block, so tracing
+    does not slow the timed runs.
+    """
+    def score(columns):
+        pollution, aqi, risk = score_batch(columns)
+        recommendation_keys_batch(columns, pollution, aqi)
+
+    elapsed = 0.0
+    relative = 0.0
+    noise = 0.0
+    peak = 0
+    done = 0
+    block_seed = seed
+    while done < rows:
+        count = min(BLOCK_ROWS, rows - done)
+        columns = synthetic_columns(count, block_seed)
+        block_seed += 1
+
+        tracemalloc.start()
+        score(columns)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        best, block_noise, block_relative = _best_of(partial(score, columns), repeat)
+        elapsed += best
+        relative += block_relative
+        noise = max(noise, block_noise)
+        done += count
+        del columns
+
+    return {
+        f'batch.{rows}.rows_per_s': _metric(rows / elapsed, 'rows/s', 'higher', noise,
+                                               rows / relative),
+        f'batch.{rows}.peak_mib': _metric(peak / 2 ** 20, 'MiB', 'lower'),
+    }
+
+
+def bench_gui(repeat=20):
+    """Incremental redraw time of the recommendation panel; empty when Tk is unavailable
+
+    Each timed pass walks keys 0..31, so every call goes through the
+    mark-based diff that only inserts or deletes the blocks whose bit
+    flipped; the full-panel draw after a clear is not measured.
+    """
+    try:
+        import tkinter as tk
+        from ai_project_pollution import AdvancedFactoryAnalyzer
+        root = tk.Tk()
+    except Exception as e:
+        return {}, f"GUI benchmark skipped: {e}"
+
+    try:
+        root.withdraw()
+        app = AdvancedFactoryAnalyzer(root)
+        reports = [(report, key) for key, report in enumerate(RECOMMENDATION_REPORTS)]
+
+        def render():
+            for report, key in reports:
+                app.display_recommendations(report, key)
+            root.update_idletasks()
+
+        render()  # the first call draws the full panel and sets the block marks
+        best = min(timeit.repeat(render, number=1, repeat=repeat))
+        return {
+            'gui.rec_incremental_redraw': _metric(best / len(reports) * 1e3, 'ms', 'lower')
+        }, None
+    finally:
+        root.destroy()
+
+
+def run_suite(sizes=DEFAULT_SIZES, seed=0, gui=True):
+    """Run every benchmark and return a JSON-serializable report"""
+    results = {}
+    notes = []
+    results.update(bench_latency(seed=seed))
+    for rows in sizes:
+        results.update(bench_batch(rows, seed))
+    if gui:
+        gui_results, note = bench_gui()
+        results.update(gui_results)
+        if note:
+            notes.append(note)
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'sizes': list(sizes),
+            'notes': notes
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """List (name, baseline, current, change) for metrics that regressed
+
+    Timing metrics are compared in reference-loop units when both reports
+    have them, so a slower or busier machine does not read as a
+    regression. change is the relative move in the bad direction, so a
+    positive value counts as a regression for both lower- and
+    higher-is-better metrics once it exceeds tolerance plus the larger
+    noise recorded for the metric in either report.
+    """
+    regressions = []
+    for name, metric in current['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or not old['value']:
+            continue
+        key = 'relative' if 'relative' in metric and 'relative' in old else 'value'
+        change = (metric[key] - old[key]) / old[key]
+        if metric['better'] == 'higher':
+            change = -change
+        if change > tolerance + max(metric.get('noise', 0.0), old.get('noise', 0.0)):
+            regressions.append((name, old['value'], metric['value'], change))
+    return regressions
+
+
+def format_report(report):
+    """Plain-text table of a benchmark report"""
+    lines = []
+    for name, metric in report['results'].items():
+        lines.append(f"{name:<40} {metric['value']:>16,.2f} {metric['unit']}")
+    for note in report['meta']['notes']:
+        lines.append(note)
+    return '\n'.join(lines)
+
+
+def best_of_reports(reports):
+    """Merge reports of the same suite, keeping each metric's most favourable result"""
+    merged = dict(reports[0], results=dict(reports[0]['results']))
+    for report in reports[1:]:
+        for name, metric in report['results'].items():
+            kept = merged['results'].get(name)
+            if kept is None:
+                merged['results'][name] = metric
+                continue
+            key = 'relative' if 'relative' in metric and 'relative' in kept else 'value'
+            sign = 1 if metric['better'] == 'higher' else -1
+            if sign * metric[key] > sign * kept[key]:
+                merged['results'][name] = metric
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pollution model hot paths")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated batch row counts (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--no-gui', action='store_true', help="skip the Tk render benchmark")
+    parser.add_argument('-o', '--output', help="write the JSON report to this file")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown beyond measured noise before failing "
+                             "(default: %(default)s)")
+    parser.add_argument('--confirm', type=int, default=DEFAULT_CONFIRM_RUNS,
+                        help="extra suite runs that must all reproduce a regression before "
+                             "failing (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    report = run_suite(sizes, args.seed, gui=not args.no_gui)
+    print(format_report(report))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare(report, baseline, args.tolerance)
+        for _ in range(args.confirm):
+            if not regressions:
+                break
+            print(f"Re-running the suite to confirm {len(regressions)} regression(s)")
+            report = best_of_reports([report, run_suite(sizes, args.seed, gui=not args.no_gui)])
+            regressions = compare(report, baseline, args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:,.2f} -> {new:,.2f} ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Command-Line Batch Scoring
+
+Headless entry point that scores a CSV/JSONL file or stdin and writes
+per-row pollutant, AQI and risk output. Does not import tkinter.
+
+    python pollution_cli.py readings.csv -o scored.jsonl --chunk-size 50000
+    python pollution_cli.py readings.csv -o scored.npz -j 8
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pollution_batch import score_batch
+from pollution_export import (BINARY_FORMATS, OUTPUT_FORMATS, detect_output_format,
+                              open_result_writer)
+from pollution_io import (FORMATS, ParseStats, detect_format, iter_chunks, iter_records,
+                          open_stream, score_chunks, write_results)
+from pollution_instrument import INSTRUMENTS
+from pollution_parallel import ShardingError, score_file_parallel
+
+
+def build_parser():
+    """Argument parser for the batch CLI"""
+    parser = argparse.ArgumentParser(
+        description="Score factory operating data for pollution, AQI and risk")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="CSV/JSONL input file, or '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, or '-' for stdout (default)")
+    parser.add_argument('--input-format', choices=FORMATS,
+                        help="input format (default: from file extension, else csv)")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS,
+                        help="output format; npz/npy write NumPy column files "
+                             "(default: from file extension, else csv)")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="rows per scoring chunk (default: 10000)")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="worker processes for scoring (default: 1)")
+    parser.add_argument('--on-error', choices=('zero', 'skip'), default='zero',
+                        help="zero-fill bad cells or skip the row (default: zero)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="do not print the throughput summary")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="collect per-stage timings and write a JSON snapshot to PATH")
+    parser.add_argument('--profile', action='store_true',
+                        help="include a cProfile report in the metrics snapshot")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="include tracemalloc current/peak memory in the metrics snapshot")
+    return parser
+
+
+def _score_chunk(chunk):
+    pollution, aqi, risk = score_batch(chunk.columns)
+    return chunk, pollution, aqi, risk
+
+
+def score_chunks_pooled(chunks, workers):
+    """Score chunks on a process pool, yielding results in input order
+
+    Used when the input is a stream that cannot be split by byte range.
+    At most two chunks per worker are in flight, so memory stays bounded.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _run_stream(args, in_format, out_format, stats):
+    """Single-reader pipeline used for stdin and single-worker runs"""
+    with open_stream(args.input, 'r') as src, \
+            open_result_writer(args.output, out_format) as dst:
+        chunks = iter_chunks(iter_records(src, in_format), args.chunk_size,
+                             stats, args.on_error)
+        chunks = INSTRUMENTS.iterate('parse', chunks)
+        if args.workers > 1:
+            scored = score_chunks_pooled(chunks, args.workers)
+        else:
+            scored = score_chunks(chunks)
+        return write_results(scored, dst)
+
+
+def run(args, stderr=None):
+    """Execute a parsed CLI invocation; returns the process exit code"""
+    if stderr is None:
+        stderr = sys.stderr
+    if args.chunk_size < 1:
+        stderr.write("error: --chunk-size must be at least 1\n")
+        return 2
+    if args.workers < 1:
+        stderr.write("error: --workers must be at least 1\n")
+        return 2
+
+    in_format = args.input_format or detect_format(args.input)
+    out_format = args.format or detect_output_format(args.output)
+    if out_format in BINARY_FORMATS and args.output == '-':
+        stderr.write(f"error: the {out_format} format needs an --output path\n")
+        return 2
+    stats = ParseStats()
+
+    instrumented = bool(args.metrics or args.profile or args.trace_memory)
+    if instrumented:
+        INSTRUMENTS.enable(profile=args.profile, trace_memory=args.trace_memory)
+
+    start = time.perf_counter()
+    try:
+        with INSTRUMENTS.stage('run'):
+            written = None
+            if args.workers > 1 and args.input != '-':
+                # Stage timings from worker processes are not collected here
+                try:
+                    written, stats = score_file_parallel(args.input, args.output, args.workers,
+                                                         in_format, out_format, args.chunk_size,
+                                                         args.on_error)
+                except ShardingError as e:
+                    stderr.write(f"note: {e}; reading it in a single process instead\n")
+            if written is None:
+                written = _run_stream(args, in_format, out_format, stats)
+    except OSError as e:
+        if instrumented:
+            INSTRUMENTS.disable()
+        stderr.write(f"error: {e}\n")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    if instrumented:
+        INSTRUMENTS.count('bad_cells', stats.bad_cells)
+        INSTRUMENTS.disable()
+        if args.metrics:
+            INSTRUMENTS.dump(args.metrics)
+
+    if not args.quiet:
+        rate = written / elapsed if elapsed > 0 else float('inf')
+        stderr.write(f"{written} rows scored in {elapsed:.3f} s "
+                     f"({rate:,.0f} rows/s, {args.workers} worker(s))\n")
+        stderr.write(f"Input: {stats.report()}\n")
+        if instrumented:
+            stderr.write(f"Stages: {INSTRUMENTS.summary()}\n")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Result Export Writers
+
+Streaming writers for scored results in CSV, JSONL and NumPy binary form.
+Each writer accepts one chunk of result arrays at a time, so exports of
+any size run in bounded memory. Text rows are rendered in bulk with a
+single %-format over the whole chunk rather than one f-string per value.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from pollution_engine import POLLUTANTS, RISK_LEVELS
+
+RESULT_FIELDS = ('row',) + POLLUTANTS + ('aqi', 'risk')
+
+RESULT_DTYPES = (
+    ('row', np.int64),
+    ('pm25', np.float64),
+    ('so2', np.float64),
+    ('nox', np.float64),
+    ('co', np.float64),
+    ('aqi', np.int16),
+    ('risk', np.uint8)
+)
+
+# 'npy' writes a directory with one .npy file per column, 'npz' one archive
+OUTPUT_FORMATS = ('csv', 'jsonl', 'npz', 'npy')
+
+BINARY_FORMATS = ('npz', 'npy')
+
+_RISK_NAMES = [label for label, _ in RISK_LEVELS]
+
+# Fixed .npy header size so the row count can be patched in on close
+_NPY_HEADER_SIZE = 128
+
+
+class ResultWriter:
+    """Base class for chunked result writers"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def write_chunk(self, rows, pollution, aqi, risk):
+        """Append one chunk of pollutant columns, AQI and risk codes
+
+        rows is the chunk's input row numbers, or the first of consecutive ones.
+        """
+        count = len(aqi)
+        if count:
+            if np.ndim(rows):
+                rows = np.asarray(rows, dtype=np.int64)
+            else:
+                rows = np.arange(rows, rows + count, dtype=np.int64)
+            self._write(rows, pollution, np.asarray(aqi), np.asarray(risk))
+            self.rows += count
+        return count
+
+    def _write(self, rows, pollution, aqi, risk):
+        raise NotImplementedError
+
+    def close(self, exc_type=None):
+        """Finish the output; exc_type is the exception aborting the write, if any"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(exc_type)
+
+
+class _TextResultWriter(ResultWriter):
+    row_format = None
+
+    def __init__(self, handle, header=True):
+        super().__init__()
+        self.handle = handle
+
+    def _write(self, rows, pollution, aqi, risk):
+        count = len(rows)
+        width = len(RESULT_FIELDS)
+        cells = [None] * (count * width)
+        cells[0::width] = rows.tolist()
+        for i, name in enumerate(POLLUTANTS, 1):
+            cells[i::width] = pollution[name].tolist()
+        cells[5::width] = aqi.tolist()
+        cells[6::width] = [_RISK_NAMES[code] for code in risk.tolist()]
+        self.handle.write((self.row_format * count) % tuple(cells))
+
+
+class CsvResultWriter(_TextResultWriter):
+    """CSV rows with pollutant values at four decimal places"""
+
+    row_format = '%d,%.4f,%.4f,%.4f,%.4f,%d,%s\n'
+
+    def __init__(self, handle, header=True):
+        super().__init__(handle, header)
+        if header:
+            handle.write(','.join(RESULT_FIELDS) + '\n')
+
+
+class JsonlResultWriter(_TextResultWriter):
+    """One JSON object per row, matching json.dumps output"""
+
+    row_format = ('{"row": %d, "pm25": %r, "so2": %r, "nox": %r, "co": %r, '
+                  '"aqi": %d, "risk": "%s"}\n')
+
+
+def _npy_header(dtype, rows):
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(np.dtype(dtype)), rows)
+    preamble = b'\x93NUMPY\x01\x00'
+    length = _NPY_HEADER_SIZE - len(preamble) - 2
+    body = text.ljust(length - 1).encode('latin1') + b'\n'
+    if len(body) != length:
+        raise ValueError("Row count too large for the reserved .npy header")
+    return preamble + length.to_bytes(2, 'little') + body
+
+
+class NpyResultWriter(ResultWriter):
+    """Column files in NumPy .npy format, optionally packed into one .npz
+
+    Data is appended to each column file as it arrives; the headers are
+    rewritten with the final row count on close. A path ending in .npz is
+    assembled from the column files at close without loading them. When
+    closed because of an exception, the partial column files are removed
+    and no archive is written.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = str(path)
+        self.archive = self.path.lower().endswith('.npz')
+        if self.archive:
+            self.directory = tempfile.mkdtemp(prefix='pollution_npz_')
+        else:
+            self.directory = self.path
+            os.makedirs(self.directory, exist_ok=True)
+        self.files = {}
+        for name, dtype in RESULT_DTYPES:
+            handle = open(os.path.join(self.directory, name + '.npy'), 'wb')
+            handle.write(_npy_header(dtype, 0))
+            self.files[name] = handle
+
+    def _write(self, rows, pollution, aqi, risk):
+        columns = dict(pollution, row=rows, aqi=aqi, risk=risk)
+        for name, dtype in RESULT_DTYPES:
+            self.files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+    def append_columns(self, directory, block_rows=1 << 20):
+        """Append the columns of another npy result directory, block by block"""
+        arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                  for name, _ in RESULT_DTYPES}
+        count = len(arrays['row'])
+        for start in range(0, count, block_rows):
+            for name, _ in RESULT_DTYPES:
+                self.files[name].write(arrays[name][start:start + block_rows].tobytes())
+        self.rows += count
+        return count
+
+    def close(self, exc_type=None):
+        if not self.files:
+            return
+        if exc_type is not None:
+            self._discard()
+            return
+        for name, dtype in RESULT_DTYPES:
+            handle = self.files[name]
+            handle.seek(0)
+            handle.write(_npy_header(dtype, self.rows))
+            handle.close()
+        self.files = {}
+
+        if self.archive:
+            try:
+                with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED,
+                                     allowZip64=True) as archive:
+                    for name, _ in RESULT_DTYPES:
+                        # Fixed timestamp keeps archives byte-identical across runs
+                        info = zipfile.ZipInfo(name + '.npy', date_time=(1980, 1, 1, 0, 0, 0))
+                        with open(os.path.join(self.directory, name + '.npy'), 'rb') as src, \
+                                archive.open(info, 'w', force_zip64=True) as dst:
+                            shutil.copyfileobj(src, dst, 1 << 20)
+            finally:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _discard(self):
+        for handle in self.files.values():
+            handle.close()
+        self.files = {}
+        if self.archive:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        for name, _ in RESULT_DTYPES:
+            try:
+                os.remove(os.path.join(self.directory, name + '.npy'))
+            except OSError:
+                pass
+
+
+def detect_output_format(path, default='csv'):
+    """Guess the output format from a file name"""
+    name = str(path).lower()
+    if name.endswith('.npz'):
+        return 'npz'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return default
+
+
+@contextmanager
+def open_result_writer(destination, fmt='csv', header=True):
+    """Open a ResultWriter on a path, or '-' for stdout in text formats"""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+
+    if fmt in BINARY_FORMATS:
+        if destination == '-':
+            raise ValueError(f"The {fmt} format needs an output path, not stdout")
+        if fmt == 'npz' and not str(destination).lower().endswith('.npz'):
+            destination = str(destination) + '.npz'
+        with NpyResultWriter(destination) as writer:
+            yield writer
+        return
+
+    writer_class = CsvResultWriter if fmt == 'csv' else JsonlResultWriter
+    if destination == '-':
+        yield writer_class(sys.stdout, header)
+        sys.stdout.flush()
+        return
+
+    with open(destination, 'w', newline='', encoding='utf-8') as handle:
+        yield writer_class(handle, header)
@@ -0,0 +1,173 @@
+"""
+Hot-Path Instrumentation
+
+Lightweight per-stage timers, call counters and optional cProfile /
+tracemalloc capture shared by the GUI, batch and CLI code paths. When
+disabled, stage() hands back one shared no-op context manager and
+iterate() returns its input unchanged, so the hooks cost a method call and
+an attribute check.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+
+
+class Instrumentation:
+    """Runtime-switchable collector of stage timings and counters"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = {}
+        self.counters = {}
+        self._profiler = None
+        self._tracing = False
+        self._memory = None
+
+    def enable(self, profile=False, trace_memory=False):
+        """Start collecting; optionally run cProfile and tracemalloc too"""
+        self.enabled = True
+        if profile and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def disable(self):
+        """Stop collecting; gathered numbers stay available until reset()"""
+        self.enabled = False
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._tracing:
+            self._memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._tracing = False
+
+    def reset(self):
+        """Drop all collected timings, counters and profiles"""
+        self.stages = {}
+        self.counters = {}
+        self._memory = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+            if self.enabled:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+        if self._tracing:
+            tracemalloc.reset_peak()
+
+    def stage(self, name):
+        """Context manager timing one execution of a named stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Add one timing sample for a stage"""
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+    def count(self, name, amount=1):
+        """Increment a named counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def iterate(self, name, iterable):
+        """Time how long each item of an iterable takes to produce"""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - start)
+            yield item
+
+    def snapshot(self, profile_lines=25):
+        """JSON-serializable view of everything collected so far"""
+        stages = {
+            name: {
+                'calls': calls,
+                'total_ms': total * 1e3,
+                'mean_ms': total / calls * 1e3,
+                'max_ms': worst * 1e3
+            }
+            for name, (calls, total, worst) in self.stages.items()
+        }
+        snapshot = {
+            'enabled': self.enabled,
+            'stages': stages,
+            'counters': dict(self.counters)
+        }
+
+        memory = tracemalloc.get_traced_memory() if self._tracing else self._memory
+        if memory:
+            current, peak = memory
+            snapshot['memory'] = {'current_kib': current / 1024, 'peak_kib': peak / 1024}
+
+        if self._profiler is not None:
+            buffer = io.StringIO()
+            try:
+                # Building Stats disables the profiler, so resume it afterwards
+                stats = pstats.Stats(self._profiler, stream=buffer)
+                stats.sort_stats('cumulative').print_stats(profile_lines)
+                snapshot['profile'] = buffer.getvalue()
+            except TypeError:
+                pass  # nothing profiled yet
+            if self.enabled:
+                self._profiler.enable()
+        return snapshot
+
+    def dump(self, path, profile_lines=25):
+        """Write snapshot() as JSON to a file"""
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.snapshot(profile_lines), handle, indent=2)
+
+    def summary(self, names=None):
+        """One-line mean time per stage, e.g. for a status bar"""
+        names = names or list(self.stages)
+        parts = []
+        for name in names:
+            entry = self.stages.get(name)
+            if entry:
+                parts.append(f"{name} {entry[1] / entry[0] * 1e3:.2f}ms")
+        return ' | '.join(parts)
+
+
+# Process-wide collector used by the GUI, batch and CLI hooks
+INSTRUMENTS = Instrumentation()
@@ -0,0 +1,226 @@
+"""
+Streaming Sensor Log Ingestion
+
+Generator-based readers for historian exports in CSV or JSONL format.
+Records are parsed into fixed-size column chunks, scored with the batch
+model and streamed into a pollution_export writer, so memory use stays
+bounded regardless of file size.
+"""
+
+import csv
+import json
+import math
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+
+from pollution_batch import score_batch
+from pollution_engine import PARAMETER_KEYS
+from pollution_export import detect_output_format, open_result_writer
+from pollution_instrument import INSTRUMENTS
+
+FORMATS = ('csv', 'jsonl')
+
+
+class ParseStats:
+    """Counts of rows read and cells that could not be parsed"""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped_rows = 0
+        self.malformed_rows = 0
+        self.bad_cells = 0
+        self.bad_by_column = dict.fromkeys(PARAMETER_KEYS, 0)
+
+    def record_bad(self, key):
+        self.bad_cells += 1
+        self.bad_by_column[key] += 1
+
+    def merge(self, other):
+        """Add the counts of another ParseStats into this one"""
+        self.rows += other.rows
+        self.skipped_rows += other.skipped_rows
+        self.malformed_rows += other.malformed_rows
+        self.bad_cells += other.bad_cells
+        for key, count in other.bad_by_column.items():
+            self.bad_by_column[key] += count
+
+    def report(self):
+        """Human-readable summary of parse problems"""
+        text = f"{self.rows} rows read, {self.bad_cells} bad cells"
+        if self.malformed_rows:
+            text += f", {self.malformed_rows} malformed rows"
+        if self.skipped_rows:
+            text += f", {self.skipped_rows} rows skipped"
+        bad = [f"{key}={count}" for key, count in self.bad_by_column.items() if count]
+        if bad:
+            text += f" ({', '.join(bad)})"
+        return text
+
+
+class Chunk:
+    """Fixed-size block of parsed input columns and their input row numbers"""
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    @property
+    def first_row(self):
+        return int(self.rows[0])
+
+    def __len__(self):
+        return len(self.columns[PARAMETER_KEYS[0]])
+
+
+def detect_format(path, default='csv'):
+    """Guess the record format from a file name"""
+    name = str(path).lower()
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Open a path for text streaming, treating '-' as stdin/stdout"""
+    if path == '-':
+        yield sys.stdin if 'r' in mode else sys.stdout
+    else:
+        with open(path, mode, newline='', encoding='utf-8') as handle:
+            yield handle
+
+
+def parse_json_record(line):
+    """Decode one JSONL line, or None if it is not a JSON object"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def iter_records(handle, fmt='csv'):
+    """Yield one mapping of raw field values per input record
+
+    Malformed JSONL lines yield None so that they still take a row number;
+    iter_chunks counts and skips them.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(handle)
+    elif fmt == 'jsonl':
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield parse_json_record(line)
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+
+
+def parse_cell(raw):
+    """Parse one cell to a non-negative float, or None if it is unusable"""
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, (int, float)):
+        value = float(raw)
+    else:
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            return None
+    if not math.isfinite(value):
+        return None
+    return max(0.0, value)
+
+
+def iter_chunks(records, chunk_size=10000, stats=None, on_error='zero', row_offset=0):
+    """Group records into Chunks of parsed columns
+
+    Unparseable or missing cells are counted in stats. With on_error='zero'
+    they are replaced by 0.0, matching the GUI; with 'skip' the whole row
+    is dropped. Malformed JSONL lines (None records) are counted in
+    stats.malformed_rows and handled the same way, as rows with every cell
+    missing. Row numbers start at row_offset, and each Chunk keeps the input
+    row numbers of the rows it holds, so skipped rows leave gaps.
+    """
+    if on_error not in ('zero', 'skip'):
+        raise ValueError(f"Unsupported on_error mode: {on_error}")
+    stats = stats if stats is not None else ParseStats()
+    width = len(PARAMETER_KEYS)
+
+    buffer = np.empty((chunk_size, width), dtype=np.float64)
+    rows = np.empty(chunk_size, dtype=np.int64)
+    filled = 0
+    for row, record in enumerate(records, row_offset):
+        stats.rows += 1
+        target = buffer[filled]
+        ok = True
+        if record is None:
+            stats.malformed_rows += 1
+            ok = False
+            target[:] = 0.0
+        else:
+            for i, key in enumerate(PARAMETER_KEYS):
+                value = parse_cell(record.get(key))
+                if value is None:
+                    stats.record_bad(key)
+                    ok = False
+                    value = 0.0
+                target[i] = value
+
+        if not ok and on_error == 'skip':
+            stats.skipped_rows += 1
+            continue
+
+        rows[filled] = row
+        filled += 1
+        if filled == chunk_size:
+            yield _make_chunk(rows, buffer)
+            buffer = np.empty((chunk_size, width), dtype=np.float64)
+            rows = np.empty(chunk_size, dtype=np.int64)
+            filled = 0
+
+    if filled:
+        yield _make_chunk(rows[:filled], buffer[:filled])
+
+
+def _make_chunk(rows, block):
+    columns = {key: block[:, i] for i, key in enumerate(PARAMETER_KEYS)}
+    return Chunk(rows, columns)
+
+
+def score_chunks(chunks):
+    """Yield (chunk, pollution, aqi, risk_codes) for each input chunk"""
+    for chunk in chunks:
+        pollution, aqi, risk = score_batch(chunk.columns)
+        INSTRUMENTS.count('chunks')
+        INSTRUMENTS.count('rows', len(chunk))
+        yield chunk, pollution, aqi, risk
+
+
+def write_results(scored, writer):
+    """Stream scored chunks into a ResultWriter; returns the number of rows written"""
+    written = 0
+    for chunk, pollution, aqi, risk in scored:
+        with INSTRUMENTS.stage('write'):
+            written += writer.write_chunk(chunk.rows, pollution, aqi, risk)
+    return written
+
+
+def run_pipeline(source, destination, in_format=None, out_format=None,
+                 chunk_size=10000, on_error='zero'):
+    """Score a CSV/JSONL file (or '-' for stdin) into a CSV/JSONL/npz/npy output
+
+    Returns (rows_written, ParseStats).
+    """
+    in_format = in_format or detect_format(source)
+    out_format = out_format or detect_output_format(destination)
+    stats = ParseStats()
+    with open_stream(source, 'r') as src, open_result_writer(destination, out_format) as dst:
+        chunks = iter_chunks(iter_records(src, in_format), chunk_size, stats, on_error)
+        chunks = INSTRUMENTS.iterate('parse', chunks)
+        written = write_results(score_chunks(chunks), dst)
+    return written, stats
@@ -0,0 +1,385 @@
+"""
+Inverse Optimizer
+
+Finds, for each plant state, the cheapest change to the controllable
+parameters (efficiency, maintenance, fuel, quality) that brings the AQI
+below a target such as 100 (MODERATE or better) or 50 (LOW).
+
+AQI falls monotonically as efficiency or quality rise, as fuel drops and
+when maintenance crosses its threshold. For a fixed fuel level and
+maintenance setting, AQI is linear in efficiency and, until CO reaches
+zero, in quality, so the cheapest efficiency/quality change follows in
+closed form: spend on the lever with the lower cost per AQI point first.
+The solver scans fuel on a grid, refines the best grid point with a
+golden-section search, and does this with and without the maintenance
+upgrade. It also tries every lever order (push levers to their bounds in
+turn, bisect the last one) and keeps the cheapest feasible result. The
+remaining gap to the true optimum comes only from the fuel search, which
+assumes the cost is unimodal around the best grid point. All plants in a
+batch are solved together with array operations.
+"""
+
+from collections import OrderedDict
+from itertools import permutations
+
+import numpy as np
+
+from pollution_batch import as_columns, assess_risk_batch
+from pollution_engine import PARAMETER_KEYS, RISK_BREAKPOINTS, RISK_LEVELS
+from pollution_profiles import DEFAULT_PROFILE
+from pollution_scenarios import BOUNDS, aqi_raw_batch, calculate_pollution_batch
+
+# Continuous levers and the direction that lowers AQI
+LEVERS = (('efficiency', 1), ('fuel', -1), ('quality', 1))
+
+# Fuel levels tried per plant, and golden-section steps refining the best one
+FUEL_GRID = 129
+FUEL_REFINE_STEPS = 40
+
+# AQI kept below the target to absorb rounding in the closed-form solution
+AQI_MARGIN = 1e-9
+
+_INV_PHI = (np.sqrt(5) - 1) / 2
+
+CONTROLLED = tuple(key for key, _ in LEVERS) + ('maintenance',)
+
+
+def target_for_risk(level):
+    """AQI target that puts a plant in the given risk level or better"""
+    labels = [label for label, _ in RISK_LEVELS]
+    code = labels.index(level)
+    if code >= len(RISK_BREAKPOINTS):
+        return 501
+    return RISK_BREAKPOINTS[code]
+
+
+class InverseSolution:
+    """Per-plant result arrays of InverseSolver.solve"""
+
+    def __init__(self, settings, cost, feasible, aqi):
+        self.settings = settings
+        self.cost = cost
+        self.feasible = feasible
+        self.aqi = aqi
+        self.risk = assess_risk_batch(aqi)
+
+    def __len__(self):
+        return len(self.cost)
+
+    def row(self, index):
+        """Plain dict for one plant"""
+        return {
+            'settings': {key: float(values[index]) for key, values in self.settings.items()},
+            'cost': float(self.cost[index]),
+            'feasible': bool(self.feasible[index]),
+            'aqi': int(self.aqi[index]),
+            'risk': RISK_LEVELS[self.risk[index]][0]
+        }
+
+
+class InverseSolver:
+    """Batch minimal-change search with a result cache and warm starts
+
+    costs gives the price of moving each controlled parameter across its
+    whole PARAMETERS range (default 1.0 each). States already solved are
+    answered from an LRU cache keyed on the inputs quantized to
+    `resolution` of each range. profile selects the emission-factor
+    coefficients the target is evaluated under.
+    """
+
+    def __init__(self, target=100, costs=None, tolerance=1e-6, cache_size=100000,
+                 resolution=1e-6, profile=None):
+        if isinstance(target, str):
+            target = target_for_risk(target)
+        self.target = target
+        self.profile = profile or DEFAULT_PROFILE
+        self.maintenance_threshold = self.profile.coefficients.maintenance_threshold
+        # Smallest setting that counts as maintained (strictly above the threshold)
+        self.maintenance_target = np.nextafter(self.maintenance_threshold, np.inf)
+        self.costs = dict.fromkeys(CONTROLLED, 1.0)
+        if costs:
+            self.costs.update(costs)
+        self.tolerance = tolerance
+        self.cache_size = cache_size
+        self.resolution = resolution
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def solve_one(self, values, warm_start=None):
+        """Solve a single plant given a values dict; returns InverseSolution.row"""
+        columns = {key: np.array([values[key]], dtype=np.float64) for key in PARAMETER_KEYS}
+        hint = None
+        if warm_start is not None:
+            hint = {key: np.array([value], dtype=np.float64)
+                    for key, value in warm_start.items()}
+        return self.solve(columns, hint).row(0)
+
+    def solve(self, columns, warm_start=None):
+        """Solve every plant in columnar input
+
+        warm_start optionally maps controlled keys to previously found
+        settings per row (e.g. last period's solution for the same
+        plants); they narrow the bisection brackets when still valid.
+        """
+        columns = as_columns(columns)
+        rows = len(columns[PARAMETER_KEYS[0]])
+        keys = self._cache_keys(columns)
+
+        settings = {key: columns[key].copy() for key in CONTROLLED}
+        cost = np.zeros(rows)
+        feasible = np.zeros(rows, dtype=bool)
+
+        pending = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                pending.append(i)
+                continue
+            self.cache.move_to_end(key)
+            self.hits += 1
+            for name, value in zip(CONTROLLED, cached[0]):
+                settings[name][i] = value
+            cost[i], feasible[i] = cached[1], cached[2]
+
+        if pending:
+            index = np.array(pending)
+            self.misses += len(index)
+            subset = {key: values[index] for key, values in columns.items()}
+            hint = None
+            if warm_start is not None:
+                hint = {key: np.asarray(values, dtype=np.float64)[index]
+                        for key, values in warm_start.items()}
+            sub_settings, sub_cost, sub_feasible = self._solve(subset, hint)
+            for name in CONTROLLED:
+                settings[name][index] = sub_settings[name]
+            cost[index] = sub_cost
+            feasible[index] = sub_feasible
+            self._store(keys, index, sub_settings, sub_cost, sub_feasible)
+
+        final = dict(columns, **settings)
+        aqi = aqi_raw_batch(calculate_pollution_batch(final, self.profile),
+                            self.profile).astype(np.int16)
+        return InverseSolution(settings, cost, feasible, aqi)
+
+    def _cache_keys(self, columns):
+        scale = np.array([(BOUNDS[key][1] - BOUNDS[key][0]) * self.resolution
+                          for key in PARAMETER_KEYS])
+        matrix = np.column_stack([columns[key] for key in PARAMETER_KEYS])
+        quantized = np.round(matrix / scale).astype(np.int64)
+        return [(self.target,) + tuple(row) for row in quantized.tolist()]
+
+    def _store(self, keys, index, settings, cost, feasible):
+        if not self.cache_size:
+            return
+        stacked = np.column_stack([settings[name] for name in CONTROLLED]).tolist()
+        for position, i in enumerate(index.tolist()):
+            self.cache[keys[i]] = (tuple(stacked[position]), float(cost[position]),
+                                   bool(feasible[position]))
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _meets(self, columns):
+        pollution = calculate_pollution_batch(columns, self.profile)
+        return aqi_raw_batch(pollution, self.profile) < self.target
+
+    def _change_cost(self, base, candidate):
+        total = np.zeros(len(base['fuel']))
+        for key in CONTROLLED:
+            low, high = BOUNDS[key]
+            total += self.costs[key] * np.abs(candidate[key] - base[key]) / (high - low)
+        return total
+
+    def _solve(self, base, hint):
+        already = self._meets(base)
+
+        best_cost = np.where(already, 0.0, np.inf)
+        best = {key: base[key].copy() for key in CONTROLLED}
+
+        upgrades = [False]
+        if np.any(base['maintenance'] <= self.maintenance_threshold):
+            upgrades.append(True)
+
+        for upgrade in upgrades:
+            for order in permutations(LEVERS):
+                ok, values = self._strategy(base, ~already, upgrade, order, hint)
+                cost = self._change_cost(base, values)
+                better = ok & (cost < best_cost)
+                best_cost = np.where(better, cost, best_cost)
+                for key in CONTROLLED:
+                    best[key] = np.where(better, values[key], best[key])
+
+            ok, values = self._fuel_scan(base, ~already, upgrade)
+            cost = self._change_cost(base, values)
+            better = ok & (cost < best_cost)
+            best_cost = np.where(better, cost, best_cost)
+            for key in CONTROLLED:
+                best[key] = np.where(better, values[key], best[key])
+
+        feasible = np.isfinite(best_cost)
+        cost = np.where(feasible, best_cost, np.nan)
+        if not np.all(feasible):
+            # Report the most that can be done for plants that cannot reach the target
+            for key, direction in LEVERS:
+                best[key] = np.where(feasible, best[key], self._bound(base[key], key, direction))
+            best['maintenance'] = np.where(feasible, best['maintenance'],
+                                           np.maximum(base['maintenance'], self.maintenance_target))
+            cost = np.where(feasible, cost, self._change_cost(base, best))
+        return best, cost, feasible
+
+    def _fuel_scan(self, base, active, upgrade):
+        """Cheapest setting per row with fuel searched and efficiency/quality solved exactly"""
+        columns = dict(base)
+        if upgrade:
+            columns['maintenance'] = np.maximum(base['maintenance'], self.maintenance_target)
+        values = {key: columns[key].copy() for key in CONTROLLED}
+        ok = np.zeros(len(base['fuel']), dtype=bool)
+        index = np.flatnonzero(active)
+        if not len(index):
+            return ok, values
+
+        sub = {key: column[index] for key, column in columns.items()}
+        start = sub['fuel']
+        span = self._bound(start, 'fuel', -1) - start
+
+        fractions = np.linspace(0.0, 1.0, FUEL_GRID)
+        grid = np.array([self._fuel_step(sub, start + span * t)[0] for t in fractions])
+        best = np.argmin(grid, axis=0)
+        best_t = fractions[best]
+        best_cost = grid[best, np.arange(len(index))]
+
+        # Golden-section search between the grid neighbours of the best point
+        lo = fractions[np.maximum(best - 1, 0)]
+        hi = fractions[np.minimum(best + 1, FUEL_GRID - 1)]
+        for _ in range(FUEL_REFINE_STEPS):
+            left = hi - (hi - lo) * _INV_PHI
+            right = lo + (hi - lo) * _INV_PHI
+            keep_left = (self._fuel_step(sub, start + span * left)[0] <=
+                         self._fuel_step(sub, start + span * right)[0])
+            hi = np.where(keep_left, right, hi)
+            lo = np.where(keep_left, lo, left)
+        middle = (lo + hi) / 2
+        refined = self._fuel_step(sub, start + span * middle)[0]
+        best_t = np.where(refined < best_cost, middle, best_t)
+
+        fuel = start + span * best_t
+        _, efficiency, quality = self._fuel_step(sub, fuel)
+        found = np.isfinite(efficiency)
+        trial = dict(sub, fuel=fuel, efficiency=np.where(found, efficiency, sub['efficiency']),
+                     quality=np.where(found, quality, sub['quality']))
+        for key in ('fuel', 'efficiency', 'quality'):
+            values[key][index] = trial[key]
+        ok[index] = found & self._meets(trial)
+        return ok, values
+
+    def _fuel_step(self, sub, fuel):
+        """(cost of fuel and the cheapest efficiency/quality change, efficiency, quality) at a fuel level
+
+        Rows that cannot reach the target at this fuel level get an
+        infinite cost and NaN settings.
+        """
+        coefficients = self.profile.coefficients
+        weights = self.profile.aqi_weights()
+        pollution = calculate_pollution_batch(dict(sub, fuel=fuel), self.profile)
+        raw = sum(weights[name] * pollution[name] for name in pollution)
+        need = np.maximum(raw - (self.target - AQI_MARGIN), 0.0)
+
+        # PM2.5 scales with (100 - efficiency), so each efficiency point removes pm25 / (100 - e)
+        efficiency = sub['efficiency']
+        headroom = 100 - efficiency
+        alpha = np.divide(weights['pm25'] * pollution['pm25'], headroom,
+                          out=np.zeros_like(raw), where=headroom > 0)
+        capacity_e = alpha * (self._bound(efficiency, 'efficiency', 1) - efficiency)
+
+        # CO falls by quality_co * maintenance impact per quality point until it reaches zero
+        impact = np.where(sub['maintenance'] > coefficients.maintenance_threshold,
+                          coefficients.maintenance_impact, 1.0)
+        beta = weights['co'] * coefficients.quality_co * impact
+        quality = sub['quality']
+        capacity_q = np.minimum(weights['co'] * pollution['co'],
+                                beta * (self._bound(quality, 'quality', 1) - quality))
+
+        range_e = BOUNDS['efficiency'][1] - BOUNDS['efficiency'][0]
+        range_q = BOUNDS['quality'][1] - BOUNDS['quality'][0]
+        range_f = BOUNDS['fuel'][1] - BOUNDS['fuel'][0]
+        unit_e = np.divide(self.costs['efficiency'] / range_e, alpha,
+                           out=np.full_like(raw, np.inf), where=alpha > 0)
+        unit_q = (np.full_like(raw, np.inf) if beta.max(initial=0) <= 0 else
+                  np.divide(self.costs['quality'] / range_q, beta,
+                            out=np.full_like(raw, np.inf), where=beta > 0))
+
+        # Spend on the lever with the lower cost per AQI point first
+        e_first = unit_e <= unit_q
+        first_cap = np.where(e_first, capacity_e, capacity_q)
+        take_first = np.minimum(need, first_cap)
+        take_second = need - take_first
+        second_cap = np.where(e_first, capacity_q, capacity_e)
+        feasible = take_second <= second_cap
+        take_e = np.where(e_first, take_first, take_second)
+        take_q = np.where(e_first, take_second, take_first)
+
+        delta_e = np.divide(take_e, alpha, out=np.zeros_like(raw), where=take_e > 0)
+        delta_q = np.divide(take_q, beta, out=np.zeros_like(raw), where=take_q > 0)
+        cost = (self.costs['fuel'] * np.abs(sub['fuel'] - fuel) / range_f +
+                self.costs['efficiency'] * delta_e / range_e +
+                self.costs['quality'] * delta_q / range_q)
+        cost = np.where(feasible, cost, np.inf)
+        return (cost, np.where(feasible, efficiency + delta_e, np.nan),
+                np.where(feasible, quality + delta_q, np.nan))
+
+    def _bound(self, current, key, direction):
+        low, high = BOUNDS[key]
+        return np.maximum(current, high) if direction > 0 else np.minimum(current, low)
+
+    def _strategy(self, base, active, upgrade, order, hint):
+        """Apply the maintenance upgrade and levers in order until each row meets the target"""
+        columns = dict(base)
+        if upgrade:
+            columns['maintenance'] = np.maximum(base['maintenance'], self.maintenance_target)
+        done = active & self._meets(columns)
+        remaining = active & ~done
+
+        for key, direction in order:
+            if not np.any(remaining):
+                break
+            bound = self._bound(base[key], key, direction)
+            trial = dict(columns, **{key: np.where(remaining, bound, columns[key])})
+            reach = remaining & self._meets(trial)
+            if np.any(reach):
+                value = self._bisect(columns, key, columns[key], bound, reach, hint)
+                columns[key] = np.where(reach, value, columns[key])
+            columns[key] = np.where(remaining & ~reach, bound, columns[key])
+            done |= reach
+            remaining &= ~reach
+
+        return done, columns
+
+    def _bisect(self, columns, key, start, bound, rows, hint):
+        """Smallest move from start toward bound meeting the target, per row"""
+        index = np.flatnonzero(rows)
+        sub = {name: values[index] for name, values in columns.items()}
+        lo = start[index].copy()
+        hi = bound[index].copy()
+
+        if hint is not None and key in hint:
+            guess = hint[key][index]
+            between = (guess - lo) * (hi - guess) >= 0
+            trial = dict(sub, **{key: np.where(between, guess, hi)})
+            good = between & self._meets(trial)
+            hi = np.where(good, guess, hi)
+
+        low, high = BOUNDS[key]
+        limit = (high - low) * self.tolerance
+        while True:
+            width = np.abs(hi - lo)
+            if not np.any(width > limit):
+                break
+            mid = (lo + hi) / 2
+            trial = dict(sub, **{key: mid})
+            good = self._meets(trial)
+            hi = np.where(good, mid, hi)
+            lo = np.where(good, lo, mid)
+
+        value = columns[key].copy()
+        value[index] = hi
+        return value
@@ -0,0 +1,242 @@
+"""
+Multi-Core Scoring
+
+Process-pool execution of the batch model for large historian files and
+in-memory fleets. Workers never receive pickled rows: files are split into
+byte ranges that each worker reads and parses itself, and in-memory arrays
+are shared through multiprocessing.shared_memory blocks. Output is merged
+in input order and is byte-identical to the single-process pipeline.
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pollution_batch import as_columns, score_batch
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS
+from pollution_export import BINARY_FORMATS, open_result_writer
+from pollution_io import ParseStats, iter_chunks, parse_json_record, score_chunks, write_results
+
+# Shards per worker; more shards smooth out uneven row lengths
+SHARDS_PER_WORKER = 4
+
+
+class ShardingError(ValueError):
+    """The input cannot be split into byte ranges without changing the result"""
+
+
+def _iter_lines(path, start, end):
+    """Yield decoded lines whose first byte lies in [start, end)"""
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        position = start
+        while position < end:
+            line = handle.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8')
+
+
+def _is_record(line, fmt):
+    # Mirrors the serial readers: csv skips empty lines, jsonl skips blank ones
+    if fmt == 'csv':
+        return bool(line.rstrip('\r\n'))
+    return bool(line.strip())
+
+
+def _shard_bounds(path, data_start, shards):
+    """Split [data_start, EOF) into up to `shards` newline-aligned byte ranges"""
+    size = os.path.getsize(path)
+    step = max(1, (size - data_start) // shards)
+    bounds = [data_start]
+    with open(path, 'rb') as handle:
+        for i in range(1, shards):
+            target = data_start + i * step
+            if target <= bounds[-1]:
+                continue
+            handle.seek(target - 1)
+            handle.readline()  # advance to the start of the next line
+            position = handle.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _count_records(path, start, end, fmt):
+    """(records, multiline) for a byte range
+
+    multiline is set when a CSV line has an odd number of quote characters,
+    i.e. a quoted field may continue on the next line. Such a file cannot
+    be cut at line boundaries.
+    """
+    count = 0
+    multiline = False
+    for line in _iter_lines(path, start, end):
+        if _is_record(line, fmt):
+            count += 1
+            if fmt == 'csv' and line.count('"') % 2:
+                multiline = True
+    return count, multiline
+
+
+def _shard_records(path, start, end, fmt, fieldnames):
+    lines = _iter_lines(path, start, end)
+    if fmt == 'csv':
+        return csv.DictReader(lines, fieldnames=fieldnames)
+    return (parse_json_record(line) for line in lines if line.strip())
+
+
+def _score_shard(path, start, end, fmt, fieldnames, row_offset, chunk_size,
+                 on_error, out_format, out_path):
+    stats = ParseStats()
+    records = _shard_records(path, start, end, fmt, fieldnames)
+    chunks = iter_chunks(records, chunk_size, stats, on_error, row_offset)
+    shard_format = 'npy' if out_format in BINARY_FORMATS else out_format
+    with open_result_writer(out_path, shard_format, header=False) as dst:
+        written = write_results(score_chunks(chunks), dst)
+    return written, stats
+
+
+def score_file_parallel(source, destination, workers, in_format='csv', out_format='csv',
+                        chunk_size=10000, on_error='zero'):
+    """Score a CSV/JSONL file across a process pool
+
+    The file is cut into newline-aligned byte ranges. A first pass counts
+    the records in each range so every shard knows its global row numbers;
+    the second pass parses, scores and writes each shard to a temporary
+    file (or npy column directory), which are then concatenated in order.
+
+    Raises ShardingError before any output is written when a quoted CSV
+    field may span several lines; such files must be read by a single
+    reader (see pollution_cli.score_chunks_pooled).
+
+    Returns (rows_written, ParseStats).
+    """
+    fieldnames = None
+    data_start = 0
+    if in_format == 'csv':
+        with open(source, 'rb') as handle:
+            header = handle.readline()
+            data_start = handle.tell()
+        fieldnames = next(csv.reader([header.decode('utf-8')]), [])
+
+    bounds = _shard_bounds(source, data_start, workers * SHARDS_PER_WORKER)
+    stats = ParseStats()
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            tempfile.TemporaryDirectory(prefix='pollution_') as scratch:
+        scans = list(pool.map(_count_records, *zip(*((source, s, e, in_format) for s, e in bounds))))
+        if any(multiline for _, multiline in scans):
+            raise ShardingError(f"{source} has quoted fields spanning several lines")
+        counts = [count for count, _ in scans]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).tolist()
+
+        futures = []
+        for index, ((start, end), offset) in enumerate(zip(bounds, offsets)):
+            out_path = os.path.join(scratch, f"shard_{index:05d}")
+            futures.append((out_path, pool.submit(
+                _score_shard, source, start, end, in_format, fieldnames, offset,
+                chunk_size, on_error, out_format, out_path)))
+
+        with open_result_writer(destination, out_format) as dst:
+            for out_path, future in futures:
+                shard_written, shard_stats = future.result()
+                written += shard_written
+                stats.merge(shard_stats)
+                if out_format in BINARY_FORMATS:
+                    dst.append_columns(out_path)
+                else:
+                    with open(out_path, 'r', newline='', encoding='utf-8') as part:
+                        shutil.copyfileobj(part, dst.handle)
+                    dst.rows += shard_written
+
+    return written, stats
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _score_shared(names, rows, start, end):
+    in_name, out_name, aqi_name, risk_name = names
+    blocks = []
+    try:
+        block, matrix = _attach(in_name, (rows, len(PARAMETER_KEYS)), np.float64)
+        blocks.append(block)
+        block, pollution_out = _attach(out_name, (len(POLLUTANTS), rows), np.float64)
+        blocks.append(block)
+        block, aqi_out = _attach(aqi_name, (rows,), np.int16)
+        blocks.append(block)
+        block, risk_out = _attach(risk_name, (rows,), np.uint8)
+        blocks.append(block)
+
+        pollution, aqi, risk = score_batch(matrix[start:end])
+        for i, name in enumerate(POLLUTANTS):
+            pollution_out[i, start:end] = pollution[name]
+        aqi_out[start:end] = aqi
+        risk_out[start:end] = risk
+        del matrix, pollution_out, aqi_out, risk_out
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def score_columns_parallel(columns, workers, pool=None):
+    """Score in-memory columns on a process pool via shared memory
+
+    Accepts the same input as score_batch and returns the same
+    (pollution, aqi, risk) arrays. Pass an existing ProcessPoolExecutor
+    as pool to reuse workers across calls.
+    """
+    columns = as_columns(columns)
+    rows = len(columns[PARAMETER_KEYS[0]])
+    if rows == 0 or workers <= 1:
+        return score_batch(columns)
+
+    specs = [
+        ((rows, len(PARAMETER_KEYS)), np.float64),
+        ((len(POLLUTANTS), rows), np.float64),
+        ((rows,), np.int16),
+        ((rows,), np.uint8)
+    ]
+    blocks = [shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) *
+                                                                  np.dtype(dtype).itemsize))
+              for shape, dtype in specs]
+    own_pool = pool is None
+    try:
+        views = [np.ndarray(shape, dtype=dtype, buffer=block.buf)
+                 for block, (shape, dtype) in zip(blocks, specs)]
+        for i, key in enumerate(PARAMETER_KEYS):
+            views[0][:, i] = columns[key]
+
+        if own_pool:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        names = tuple(block.name for block in blocks)
+        edges = np.linspace(0, rows, workers + 1).astype(int)
+        futures = [pool.submit(_score_shared, names, rows, int(start), int(end))
+                   for start, end in zip(edges[:-1], edges[1:]) if end > start]
+        for future in futures:
+            future.result()
+
+        pollution = {name: views[1][i].copy() for i, name in enumerate(POLLUTANTS)}
+        aqi = views[2].copy()
+        risk = views[3].copy()
+        del views
+        return pollution, aqi, risk
+    finally:
+        if own_pool and pool is not None:
+            pool.shutdown()
+        for block in blocks:
+            block.close()
+            block.unlink()
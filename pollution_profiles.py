@@ -0,0 +1,190 @@
+"""
+Emission-Factor Profiles
+
+Coefficients of the pollution and AQI model grouped into named profiles,
+e.g. one per furnace type or jurisdiction. A profile file (TOML or JSON)
+overrides any subset of the default coefficients:
+
+    name = "electric-arc"
+
+    [base]
+    pm25 = 11.0
+
+    [temperature]
+    knee = 1500
+
+Profiles are validated and compiled once into a flat Coefficients tuple
+in COEFFICIENT_FIELDS order; the engines unpack it per call, so switching
+profiles costs nothing per row. This module must stay free of NumPy and
+tkinter imports because pollution_engine builds its default from it.
+"""
+
+import json
+import math
+from collections import namedtuple
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Coefficients of the built-in model, by profile section
+DEFAULT_SECTIONS = {
+    'base': {'pm25': 15.0, 'so2': 8.0, 'nox': 12.0, 'co': 6.0},
+    'production': {'scale': 1000.0, 'pm25': 10.0, 'so2': 4.0, 'nox': 5.0},
+    'temperature': {'knee': 1200.0, 'slope': 0.001, 'pm25': 5.0, 'nox': 6.0},
+    'fuel': {'factor': 0.0005, 'pm25': 3.0, 'so2': 8.0, 'co': 6.0},
+    'quality': {'co': 0.05},
+    'efficiency': {'scale': 0.01},
+    'maintenance': {'threshold': 0.5, 'impact': 0.7},
+    'experience': {'slope': 0.03, 'floor': 0.7},
+    'aqi_scale': {'pm25': 1.0, 'so2': 20.0, 'nox': 15.0, 'co': 10.0},
+    'aqi_weights': {'pm25': 0.35, 'so2': 0.25, 'nox': 0.25, 'co': 0.15}
+}
+
+# Flat coefficient names, "<section>_<key>"
+COEFFICIENT_FIELDS = tuple(f"{section}_{key}"
+                           for section, values in DEFAULT_SECTIONS.items() for key in values)
+
+Coefficients = namedtuple('Coefficients', COEFFICIENT_FIELDS)
+
+# Emission factors come first, then the eight AQI scale and weight fields
+_AQI_START = COEFFICIENT_FIELDS.index('aqi_scale_pm25')
+
+# Coefficients that divide or scale and therefore must be strictly positive
+_POSITIVE = ('production_scale',)
+
+# Multipliers that must not raise emissions, so AQI only falls as maintenance
+# crosses its threshold or experience grows (the inverse optimizer relies on it)
+_FRACTIONS = ('maintenance_impact', 'experience_floor')
+
+PROFILE_SUFFIXES = ('.toml', '.json')
+
+
+class ProfileError(ValueError):
+    """A profile file or mapping is malformed"""
+
+
+@dataclass(slots=True, frozen=True)
+class EmissionProfile:
+    """Named, validated set of model coefficients"""
+    name: str
+    coefficients: Coefficients
+    description: str = ''
+
+    @property
+    def emission_factors(self):
+        """Flat coefficients used by the pollutant equations"""
+        return self.coefficients[:_AQI_START]
+
+    @property
+    def aqi_factors(self):
+        """AQI sub-index scales then weights, in pm25/so2/nox/co order"""
+        return self.coefficients[_AQI_START:]
+
+    def aqi_weights(self):
+        """Combined AQI weight per pollutant (sub-index scale times weight)"""
+        c = self.coefficients
+        return {'pm25': c.aqi_scale_pm25 * c.aqi_weights_pm25,
+                'so2': c.aqi_scale_so2 * c.aqi_weights_so2,
+                'nox': c.aqi_scale_nox * c.aqi_weights_nox,
+                'co': c.aqi_scale_co * c.aqi_weights_co}
+
+    def sections(self):
+        """Coefficients regrouped by section, as in a profile file"""
+        values = self.coefficients._asdict()
+        return {section: {key: values[f"{section}_{key}"] for key in keys}
+                for section, keys in DEFAULT_SECTIONS.items()}
+
+
+def compile_profile(data, name=None, base=None):
+    """Validate a profile mapping and compile it into an EmissionProfile
+
+    Sections and keys not given keep their value from base (default:
+    DEFAULT_PROFILE). Unknown sections or keys, non-numeric values,
+    negative coefficients and maintenance.impact or experience.floor
+    above 1 raise ProfileError.
+    """
+    if not isinstance(data, dict):
+        raise ProfileError("A profile must be a mapping of sections")
+    values = (base or DEFAULT_PROFILE).coefficients._asdict()
+
+    for section, entries in data.items():
+        if section in ('name', 'description'):
+            continue
+        if section not in DEFAULT_SECTIONS:
+            raise ProfileError(f"Unknown profile section: {section}")
+        if not isinstance(entries, dict):
+            raise ProfileError(f"Section [{section}] must be a table of coefficients")
+        for key, value in entries.items():
+            if key not in DEFAULT_SECTIONS[section]:
+                raise ProfileError(f"Unknown coefficient: {section}.{key}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ProfileError(f"{section}.{key} must be a number, got {value!r}")
+            value = float(value)
+            if not math.isfinite(value) or value < 0:
+                raise ProfileError(f"{section}.{key} must be finite and non-negative")
+            values[f"{section}_{key}"] = value
+
+    for field in _POSITIVE:
+        if values[field] <= 0:
+            raise ProfileError(f"{field.replace('_', '.', 1)} must be greater than zero")
+    for field in _FRACTIONS:
+        if values[field] > 1:
+            raise ProfileError(f"{field.replace('_', '.', 1)} must be between 0 and 1")
+
+    name = data.get('name', name)
+    if not name:
+        raise ProfileError("Profile has no name")
+    return EmissionProfile(str(name), Coefficients(**values), str(data.get('description', '')))
+
+
+def load_profile(path):
+    """Load and compile a .toml or .json profile; the name defaults to the file stem"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.toml':
+        if tomllib is None:
+            raise ProfileError("Reading TOML profiles needs Python 3.11+ or the tomli package")
+        with open(path, 'rb') as handle:
+            try:
+                data = tomllib.load(handle)
+            except tomllib.TOMLDecodeError as e:
+                raise ProfileError(f"{path}: {e}") from e
+    elif suffix == '.json':
+        with open(path, encoding='utf-8') as handle:
+            try:
+                data = json.load(handle)
+            except ValueError as e:
+                raise ProfileError(f"{path}: {e}") from e
+    else:
+        raise ProfileError(f"Unsupported profile format: {path.name} (use .toml or .json)")
+
+    try:
+        return compile_profile(data, name=path.stem)
+    except ProfileError as e:
+        raise ProfileError(f"{path}: {e}") from None
+
+
+def load_profiles(directory):
+    """Load every profile file in a directory into a dict keyed by profile name"""
+    profiles = {}
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() not in PROFILE_SUFFIXES:
+            continue
+        profile = load_profile(path)
+        if profile.name in profiles:
+            raise ProfileError(f"Duplicate profile name {profile.name!r} in {path}")
+        profiles[profile.name] = profile
+    return profiles
+
+
+DEFAULT_PROFILE = EmissionProfile(
+    'default',
+    Coefficients(*(value for values in DEFAULT_SECTIONS.values() for value in values.values())),
+    "Built-in coefficients of the original model")
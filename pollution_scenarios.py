@@ -0,0 +1,181 @@
+"""
+What-If Scenarios and Sensitivities
+
+Grid sweeps over one or more PARAMETERS dimensions and AQI sensitivities
+for the pollution model.
+
+Every intermediate factor of the model (production, temperature knee,
+fuel, efficiency, maintenance threshold, experience floor) depends on a
+single input. A sweep therefore evaluates each factor only along its own
+axis, shaped for broadcasting, and pays the full grid size just for the
+final multiply-adds: a 2000 x 5000 temperature/fuel grid evaluates the
+temperature knee 2000 times, not ten million.
+
+Within each linear piece the derivatives are constant, so sensitivities
+are computed analytically per region instead of by re-evaluating the
+model; finite_difference is provided as a cross-check.
+"""
+
+import numpy as np
+
+from pollution_batch import (as_columns, aqi_raw_batch, assess_risk_batch,
+                             calculate_pollution_batch, model_terms_batch)
+from pollution_engine import PARAMETER_KEYS, PARAMETERS
+from pollution_profiles import DEFAULT_PROFILE
+
+BOUNDS = {key: (low, high) for _, key, low, high in PARAMETERS}
+
+
+def _axis_values(spec):
+    if isinstance(spec, tuple) and len(spec) == 3:
+        start, stop, num = spec
+        return np.linspace(start, stop, int(num))
+    return np.asarray(spec, dtype=np.float64).ravel()
+
+
+def default_values():
+    """Midpoint of every PARAMETERS range"""
+    return {key: (low + high) / 2 for key, (low, high) in BOUNDS.items()}
+
+
+class SweepResult:
+    """Pollutant, AQI and risk grids of a sweep, one array axis per swept parameter"""
+
+    def __init__(self, axes, pollution, aqi_raw):
+        self.axes = axes
+        self.pollution = pollution
+        self.aqi_raw = aqi_raw
+        self.aqi = aqi_raw.astype(np.int16)
+        self.risk = assess_risk_batch(self.aqi)
+
+    @property
+    def shape(self):
+        return self.aqi.shape
+
+    def point(self, index):
+        """Swept parameter values at a grid index tuple"""
+        return {key: float(values[i]) for (key, values), i in zip(self.axes.items(), index)}
+
+    def lowest_aqi(self):
+        """(parameter values, AQI) of the grid point with the lowest AQI"""
+        index = np.unravel_index(np.argmin(self.aqi_raw), self.shape)
+        return self.point(index), int(self.aqi[index])
+
+    def below(self, threshold):
+        """Boolean grid of points whose AQI is under threshold"""
+        return self.aqi < threshold
+
+
+def sweep(axes, base=None, profile=None):
+    """Evaluate the model over the Cartesian grid of the given axes
+
+    axes maps parameter keys to value arrays or (start, stop, num) tuples,
+    e.g. {'temperature': (0, 2000, 2001), 'fuel': (0, 5000, 5001)}.
+    Parameters not swept are taken from base (default: range midpoints).
+    profile selects the emission-factor coefficients.
+    """
+    unknown = [key for key in axes if key not in BOUNDS]
+    if unknown:
+        raise KeyError(f"Unknown parameters: {', '.join(unknown)}")
+
+    values = default_values()
+    if base:
+        values.update(base)
+
+    axis_values = {key: _axis_values(spec) for key, spec in axes.items()}
+    ndim = len(axis_values)
+    columns = {key: np.float64(values[key]) for key in PARAMETER_KEYS}
+    for position, (key, array) in enumerate(axis_values.items()):
+        shape = [1] * ndim
+        shape[position] = len(array)
+        columns[key] = array.reshape(shape)
+
+    # Broadcasting keeps every per-parameter factor at its own axis length
+    pollution = calculate_pollution_batch(columns, profile)
+    shape = tuple(len(array) for array in axis_values.values())
+    pollution = {name: np.broadcast_to(grid, shape) for name, grid in pollution.items()}
+    return SweepResult(axis_values, pollution, aqi_raw_batch(pollution, profile))
+
+
+def sensitivities(columns, profile=None):
+    """Analytic dAQI/dparameter for every parameter, per row
+
+    Uses the continuous AQI (before integer truncation). Derivatives are
+    exact inside each linear piece: the temperature knee contributes only
+    above its threshold (1200 °C by default), the experience benefit only
+    above its floor, and a clamped pollutant or AQI contributes nothing.
+    The maintenance step has zero slope; see maintenance_jump for its
+    discrete effect.
+    """
+    columns = as_columns(columns)
+    profile = profile or DEFAULT_PROFILE
+    c = profile.coefficients
+    weights = profile.aqi_weights()
+    t = model_terms_batch(columns, profile)
+
+    d_temp = np.where(columns['temperature'] > c.temperature_knee, c.temperature_slope, 0.0)
+    d_exp = np.where(1.0 - columns['experience'] * c.experience_slope > c.experience_floor,
+                     -c.experience_slope, 0.0)
+
+    pm25_scale = t.efficiency_benefit * t.maintenance_impact * t.exp_benefit
+    pm25 = t.pm25_sum * pm25_scale
+    so2 = t.so2_sum * t.maintenance_impact
+    nox = t.nox_sum * t.exp_benefit
+    co = t.co_sum * t.maintenance_impact
+
+    # Pollutant weights, zeroed where the pollutant is clamped at 0
+    w_pm25 = np.where(pm25 > 0, weights['pm25'], 0.0)
+    w_so2 = np.where(so2 > 0, weights['so2'], 0.0)
+    w_nox = np.where(nox > 0, weights['nox'], 0.0)
+    w_co = np.where(co > 0, weights['co'], 0.0)
+
+    raw = (np.maximum(0, pm25) * weights['pm25'] + np.maximum(0, so2) * weights['so2'] +
+           np.maximum(0, nox) * weights['nox'] + np.maximum(0, co) * weights['co'])
+    active = (raw > 0) & (raw < 500)
+
+    grads = {
+        'production': (w_pm25 * c.production_pm25 * pm25_scale +
+                       w_so2 * c.production_so2 * t.maintenance_impact +
+                       w_nox * c.production_nox * t.exp_benefit) / c.production_scale,
+        'temperature': (w_pm25 * c.temperature_pm25 * pm25_scale +
+                        w_nox * c.temperature_nox * t.exp_benefit) * d_temp,
+        'fuel': (w_pm25 * c.fuel_pm25 * pm25_scale + w_so2 * c.fuel_so2 * t.maintenance_impact +
+                 w_co * c.fuel_co * t.maintenance_impact) * c.fuel_factor,
+        'quality': w_co * -c.quality_co * t.maintenance_impact,
+        'efficiency': (w_pm25 * t.pm25_sum * t.maintenance_impact * t.exp_benefit *
+                       -c.efficiency_scale),
+        'maintenance': np.zeros_like(raw),
+        'experience': (w_pm25 * t.pm25_sum * t.efficiency_benefit * t.maintenance_impact +
+                       w_nox * t.nox_sum) * d_exp,
+    }
+    # hours, age and humidity do not enter the model
+    zero = np.zeros_like(raw)
+    return {key: np.where(active, grads.get(key, zero), 0.0) for key in PARAMETER_KEYS}
+
+
+def maintenance_jump(columns, profile=None):
+    """AQI change from moving maintenance across its threshold (good minus poor)"""
+    columns = as_columns(columns)
+    good = dict(columns, maintenance=np.ones_like(columns['maintenance']))
+    poor = dict(columns, maintenance=np.zeros_like(columns['maintenance']))
+    return (aqi_raw_batch(calculate_pollution_batch(good, profile), profile) -
+            aqi_raw_batch(calculate_pollution_batch(poor, profile), profile))
+
+
+def finite_difference(columns, relative_step=1e-6, profile=None):
+    """Central-difference dAQI/dparameter, for checking sensitivities
+
+    The step is relative_step times each parameter's PARAMETERS range.
+    Results are unreliable within one step of a knee or threshold.
+    """
+    columns = as_columns(columns)
+    result = {}
+    for key in PARAMETER_KEYS:
+        low, high = BOUNDS[key]
+        step = (high - low) * relative_step
+        up = dict(columns, **{key: columns[key] + step})
+        down = dict(columns, **{key: columns[key] - step})
+        up_aqi = aqi_raw_batch(calculate_pollution_batch(up, profile), profile)
+        down_aqi = aqi_raw_batch(calculate_pollution_batch(down, profile), profile)
+        result[key] = (up_aqi - down_aqi) / (2 * step)
+    return result
@@ -0,0 +1,375 @@
+"""
+Local Scoring Service
+
+Small asyncio HTTP/JSON server wrapping the batch engine for dashboards.
+Concurrent requests are collected for a few milliseconds and scored in one
+vectorized call; results are cached in an LRU keyed on the quantized
+inputs. Runs entirely offline on the standard library and NumPy.
+
+    python pollution_service.py --port 8750
+
+    POST /score   {"production": 5000, ...}  or a list of such objects
+    GET  /stats   latency percentiles, cache hit rate, batch sizes
+    GET  /health
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+
+import numpy as np
+
+from pollution_batch import score_batch
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS, RISK_LEVELS
+from pollution_io import parse_cell
+from pollution_profiles import DEFAULT_PROFILE, load_profile
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8750
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+MAX_BODY = 16 * 2 ** 20
+
+
+class RequestError(Exception):
+    """Client error reported as HTTP 400 with a JSON message"""
+
+
+class ScoringService:
+    """Micro-batching scorer with an LRU result cache and latency stats
+
+    Readings are always scored on their exact values. The cache key is the
+    reading rounded to `quantum` (0 keys on the exact values) plus the side
+    of every model threshold it lies on, so a cache hit never crosses the
+    maintenance step or the temperature and experience knees. Within one
+    quantum cell, a hit returns the result of the first reading scored
+    there. It can differ from a fresh evaluation by the model's change
+    across one quantum, which may tip the AQI over an integer or risk
+    boundary. profile selects the emission-factor coefficients.
+    """
+
+    def __init__(self, max_batch=4096, max_delay=0.002, cache_size=100000, quantum=1e-3,
+                 latency_window=10000, profile=None):
+        self.profile = profile
+        coefficients = (profile or DEFAULT_PROFILE).coefficients
+        self._thresholds = (coefficients.maintenance_threshold, coefficients.temperature_knee,
+                            (1.0 - coefficients.experience_floor) / coefficients.experience_slope
+                            if coefficients.experience_slope else float('inf'))
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache_size = cache_size
+        self.quantum = quantum
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self.largest_batch = 0
+        self.latencies = deque(maxlen=latency_window)
+        self._pending = {}
+        self._wakeup = None
+        self._worker = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def parse(self, record):
+        """Exact parameter values of a reading; raises RequestError on bad input"""
+        if not isinstance(record, dict):
+            raise RequestError("Each reading must be a JSON object")
+        values = []
+        bad = []
+        for key in PARAMETER_KEYS:
+            value = parse_cell(record.get(key))
+            if value is None:
+                bad.append(key)
+            else:
+                values.append(value)
+        if bad:
+            raise RequestError(f"Missing or invalid parameters: {', '.join(bad)}")
+        return tuple(values)
+
+    def cache_key(self, values):
+        """Quantized values plus the threshold side of maintenance, temperature and experience"""
+        reading = dict(zip(PARAMETER_KEYS, values))
+        maintenance, knee, experience = self._thresholds
+        sides = (reading['maintenance'] > maintenance, reading['temperature'] > knee,
+                 reading['experience'] < experience)
+        if self.quantum > 0:
+            values = tuple(round(value / self.quantum) for value in values)
+        return values + sides
+
+    async def score_many(self, records):
+        """Score a list of readings, sharing one batch with concurrent callers"""
+        start = time.perf_counter()
+        readings = [self.parse(record) for record in records]
+        results = [None] * len(readings)
+        waits = []
+        for i, values in enumerate(readings):
+            key = self.cache_key(values)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                results[i] = cached
+                continue
+            self.misses += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = (values, asyncio.get_running_loop().create_future())
+                self._pending[key] = pending
+            waits.append((i, pending[1]))
+
+        if waits:
+            # The worker lingers max_delay after the first wakeup to gather more rows
+            self._wakeup.set()
+            for i, future in waits:
+                results[i] = await future
+        self.latencies.append(time.perf_counter() - start)
+        return results
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if self.max_delay > 0 and len(self._pending) < self.max_batch:
+                await asyncio.sleep(self.max_delay)
+            self._wakeup.clear()
+            while self._pending:
+                # Dicts keep insertion order, so the oldest readings go first
+                keys = list(islice(self._pending, self.max_batch))
+                batch = {key: self._pending.pop(key) for key in keys}
+                try:
+                    self._evaluate(batch)
+                except Exception as e:
+                    for _, future in batch.values():
+                        if not future.done():
+                            future.set_exception(e)
+                # Let waiting handlers respond before the next batch
+                await asyncio.sleep(0)
+
+    def _evaluate(self, batch):
+        keys = list(batch)
+        matrix = np.array([values for values, _ in batch.values()], dtype=np.float64)
+        pollution, aqi, risk = score_batch(matrix, self.profile)
+        columns = [pollution[name].tolist() for name in POLLUTANTS]
+        rows = zip(keys, *columns, aqi.tolist(), risk.tolist())
+        for key, pm25, so2, nox, co, row_aqi, code in rows:
+            result = {'pm25': pm25, 'so2': so2, 'nox': nox, 'co': co,
+                      'aqi': row_aqi, 'risk': RISK_LEVELS[code][0]}
+            self._remember(key, result)
+            future = batch[key][1]
+            if not future.done():
+                future.set_result(result)
+        self.batches += 1
+        self.batched_rows += len(keys)
+        self.largest_batch = max(self.largest_batch, len(keys))
+
+    def _remember(self, key, result):
+        if not self.cache_size:
+            return
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def stats(self):
+        """Latency percentiles (ms), cache hit rate and batching figures"""
+        lookups = self.hits + self.misses
+        latencies = np.array(self.latencies) * 1e3
+        return {
+            'requests': len(self.latencies),
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else None
+            },
+            'cache': {
+                'size': len(self.cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None
+            },
+            'batches': self.batches,
+            'mean_batch_rows': self.batched_rows / self.batches if self.batches else None,
+            'largest_batch': self.largest_batch
+        }
+
+    async def handle(self, method, path, body):
+        """Route one request; returns (status, JSON-serializable payload)"""
+        if path == '/score':
+            if method != 'POST':
+                return 405, {'error': "Use POST /score"}
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                return 400, {'error': "Request body is not valid JSON"}
+            single = isinstance(payload, dict)
+            records = [payload] if single else payload
+            if not isinstance(records, list):
+                return 400, {'error': "Expected a JSON object or a list of objects"}
+            try:
+                results = await self.score_many(records)
+            except RequestError as e:
+                return 400, {'error': str(e)}
+            return 200, results[0] if single else results
+        if path == '/stats':
+            return 200, self.stats()
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f"Unknown path: {path}"}
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, path, _ = request_line.decode('latin1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY:
+                status, payload = 413, {'error': "Request body too large"}
+                body = None
+            else:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await service.handle(method, path.split('?', 1)[0], body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+            data = json.dumps(payload).encode('utf-8')
+            keep_alive = headers.get('connection', '').lower() != 'close' and body is not None
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin1')
+                + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start the service and HTTP listener; returns (service, asyncio server)"""
+    service = service or ScoringService()
+    await service.start()
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer), host, port)
+    return service, server
+
+
+class ServiceClient:
+    """Minimal keep-alive HTTP/JSON client for the scoring service"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send one request; returns (status, decoded JSON)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            .encode('latin1') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, json.loads(data)
+
+    async def score(self, readings):
+        """POST /score and return the result(s); raises RuntimeError on errors"""
+        status, payload = await self.request('POST', '/score', readings)
+        if status != 200:
+            raise RuntimeError(f"{status}: {payload.get('error')}")
+        return payload
+
+    async def stats(self):
+        return (await self.request('GET', '/stats'))[1]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = self._reader = None
+
+
+async def _serve_forever(args):
+    profile = load_profile(args.model_profile) if args.model_profile else None
+    service = ScoringService(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1e3,
+                             cache_size=args.cache_size, quantum=args.quantum, profile=profile)
+    service, server = await start_server(service, args.host, args.port)
+    print(f"Scoring service listening on http://{args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local AQI/risk scoring service")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="bind address (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help="TCP port (default: %(default)s)")
+    parser.add_argument('--max-batch', type=int, default=4096,
+                        help="largest micro-batch (default: %(default)s)")
+    parser.add_argument('--max-delay-ms', type=float, default=2.0,
+                        help="how long to gather a micro-batch (default: %(default)s)")
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help="LRU cache entries, 0 to disable (default: %(default)s)")
+    parser.add_argument('--quantum', type=float, default=1e-3,
+                        help="input rounding step of cache keys, 0 for exact keys "
+                             "(default: %(default)s)")
+    parser.add_argument('--model-profile', metavar='FILE',
+                        help="emission-factor profile (.toml or .json) to score with")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Results Store
+
+Append-only SQLite store for scored records, so analyses survive past the
+GUI session and can be queried historically, e.g. every HAZARDOUS reading
+of one plant last month or the top-N PM2.5 days.
+
+Each append is one transaction of a whole columnar chunk. Results are
+indexed on (plant, timestamp), (risk, timestamp) and timestamp, and a
+per-plant, per-day rollup is upserted in the same transaction. Filtered
+queries therefore walk an index instead of scanning the table, and top-N
+day rankings read only the rollup. WAL journaling keeps appends cheap and
+lets readers run while a writer ingests.
+
+All times are UTC: timestamps and datetimes without a time zone, including
+date-only strings, are read as UTC, and the rollup buckets by UTC day.
+
+    with ResultStore('results.db') as store:
+        store.append_readings('plant-7', timestamps, columns)
+        hazardous = store.query(plant='plant-7', start='2024-05-01',
+                                end='2024-06-01', risk='HAZARDOUS')
+        worst = store.top_days(10)
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+
+from pollution_batch import as_columns, score_batch
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS, RISK_LEVELS
+from pollution_timeseries import parse_timestamp
+
+SECONDS_PER_DAY = 86400
+
+RESULT_COLUMNS = ('plant', 'timestamp') + POLLUTANTS + ('aqi', 'risk')
+
+_RISK_CODES = {label: code for code, (label, _) in enumerate(RISK_LEVELS)}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS plants (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    plant INTEGER NOT NULL REFERENCES plants (id),
+    timestamp REAL NOT NULL,
+    {', '.join(f'{name} REAL NOT NULL' for name in POLLUTANTS)},
+    aqi INTEGER NOT NULL,
+    risk INTEGER NOT NULL,
+    {', '.join(f'{key} REAL' for key in PARAMETER_KEYS)}
+);
+CREATE INDEX IF NOT EXISTS results_plant_time ON results (plant, timestamp);
+CREATE INDEX IF NOT EXISTS results_risk_time ON results (risk, timestamp);
+CREATE INDEX IF NOT EXISTS results_time ON results (timestamp);
+CREATE TABLE IF NOT EXISTS daily (
+    plant INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    pm25_sum REAL NOT NULL,
+    pm25_max REAL NOT NULL,
+    aqi_max INTEGER NOT NULL,
+    risk_max INTEGER NOT NULL,
+    PRIMARY KEY (plant, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_pm25_max ON daily (pm25_max);
+"""
+
+_INSERT_COLUMNS = RESULT_COLUMNS + PARAMETER_KEYS
+_INSERT = (f"INSERT INTO results ({', '.join(_INSERT_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(_INSERT_COLUMNS))})")
+
+_UPSERT_DAILY = """
+INSERT INTO daily (plant, day, rows, pm25_sum, pm25_max, aqi_max, risk_max)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (plant, day) DO UPDATE SET
+    rows = rows + excluded.rows,
+    pm25_sum = pm25_sum + excluded.pm25_sum,
+    pm25_max = max(pm25_max, excluded.pm25_max),
+    aqi_max = max(aqi_max, excluded.aqi_max),
+    risk_max = max(risk_max, excluded.risk_max)
+"""
+
+# Rankings accepted by top_days
+DAY_METRICS = {'pm25_max': 'pm25_max', 'pm25_mean': 'pm25_sum / rows', 'aqi_max': 'aqi_max'}
+
+
+def risk_code(value):
+    """Risk code for a RISK_LEVELS label or an existing code"""
+    if isinstance(value, str):
+        try:
+            return _RISK_CODES[value.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown risk level: {value}") from None
+    code = int(value)
+    if not 0 <= code < len(RISK_LEVELS):
+        raise ValueError(f"Risk code out of range: {value}")
+    return code
+
+
+class ResultStore:
+    """Append-only, indexed store of scored records backed by one SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+        self._load_plants()
+
+    def _load_plants(self):
+        self._plant_ids = dict(self.connection.execute("SELECT name, id FROM plants"))
+        self._plant_names = {plant_id: name for name, plant_id in self._plant_ids.items()}
+
+    def close(self):
+        # Refresh planner statistics so filtered queries pick the most selective index
+        self.connection.execute("PRAGMA optimize")
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT count(*) FROM results").fetchone()[0]
+
+    def plants(self):
+        """Names of every plant with stored results"""
+        self._load_plants()
+        return sorted(self._plant_ids)
+
+    def _plant_id(self, name, create=False):
+        """Cached id of a plant name; other writers' new plants are picked up on a miss"""
+        plant_id = self._plant_ids.get(name)
+        if plant_id is None:
+            self._load_plants()
+            plant_id = self._plant_ids.get(name)
+        if plant_id is None and create:
+            plant_id = self.connection.execute(
+                "INSERT INTO plants (name) VALUES (?)", (name,)).lastrowid
+            self._plant_ids[name] = plant_id
+            self._plant_names[plant_id] = name
+        return plant_id
+
+    def _plant_name(self, plant_id):
+        if plant_id not in self._plant_names:
+            self._load_plants()
+        return self._plant_names[plant_id]
+
+    def append(self, plant, timestamps, pollution, aqi, risk, columns=None):
+        """Append one chunk of scored rows in a single transaction
+
+        plant is one name for the whole chunk or a name per row;
+        timestamps are epoch seconds, ISO-8601 strings or datetimes.
+        columns optionally stores the input parameters alongside the
+        results. Returns the number of rows written.
+        """
+        aqi = np.asarray(aqi, dtype=np.int64)
+        rows = len(aqi)
+        if not rows:
+            return 0
+        times = np.asarray(timestamps)
+        if times.dtype.kind not in 'iuf':
+            times = np.array([parse_timestamp(value) for value in timestamps])
+        times = times.astype(np.float64)
+        risk = np.asarray(risk, dtype=np.int64)
+        pm25 = np.asarray(pollution['pm25'], dtype=np.float64)
+        lengths = {len(times), len(risk)} | {len(pollution[name]) for name in POLLUTANTS}
+        if lengths != {rows}:
+            raise ValueError("All result columns must have the same length")
+
+        inputs = [[None] * rows] * len(PARAMETER_KEYS)
+        if columns is not None:
+            columns = as_columns(columns)
+            inputs = [columns[key].tolist() for key in PARAMETER_KEYS]
+
+        try:
+            with self.connection:
+                if isinstance(plant, str):
+                    plant_ids = np.full(rows, self._plant_id(plant, create=True), dtype=np.int64)
+                else:
+                    unique, inverse = np.unique(np.asarray(plant), return_inverse=True)
+                    lookup = np.array([self._plant_id(str(name), create=True)
+                                       for name in unique.tolist()], dtype=np.int64)
+                    plant_ids = lookup[inverse.ravel()]
+
+                self.connection.executemany(_INSERT, zip(
+                    plant_ids.tolist(), times.tolist(),
+                    *(np.asarray(pollution[name], dtype=np.float64).tolist()
+                      for name in POLLUTANTS),
+                    aqi.tolist(), risk.tolist(), *inputs))
+                self.connection.executemany(
+                    _UPSERT_DAILY, self._daily_rollup(plant_ids, times, pm25, aqi, risk))
+        except sqlite3.Error:
+            # Plants inserted by the rolled-back transaction must not stay cached
+            self._load_plants()
+            raise
+        return rows
+
+    def _daily_rollup(self, plant_ids, times, pm25, aqi, risk):
+        """(plant, day, rows, pm25_sum, pm25_max, aqi_max, risk_max) per plant-day of a chunk"""
+        days = np.floor(times / SECONDS_PER_DAY).astype(np.int64)
+        keys = np.stack([plant_ids, days], axis=1)
+        groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        count = len(groups)
+
+        pm25_max = np.full(count, -np.inf)
+        aqi_max = np.full(count, np.iinfo(np.int64).min)
+        risk_max = np.zeros(count, dtype=np.int64)
+        np.maximum.at(pm25_max, inverse, pm25)
+        np.maximum.at(aqi_max, inverse, aqi)
+        np.maximum.at(risk_max, inverse, risk)
+        return zip(groups[:, 0].tolist(), groups[:, 1].tolist(),
+                   np.bincount(inverse, minlength=count).tolist(),
+                   np.bincount(inverse, weights=pm25, minlength=count).tolist(),
+                   pm25_max.tolist(), aqi_max.tolist(), risk_max.tolist())
+
+    def append_readings(self, plant, timestamps, columns, profile=None):
+        """Score columnar readings with score_batch and append them with their inputs"""
+        columns = as_columns(columns)
+        pollution, aqi, risk = score_batch(columns, profile)
+        return self.append(plant, timestamps, pollution, aqi, risk, columns)
+
+    def _where(self, plant=None, start=None, end=None, risk=None):
+        clauses = []
+        params = []
+        if plant is not None:
+            plant_id = self._plant_id(plant)
+            if plant_id is None:
+                return None, None
+            clauses.append("plant = ?")
+            params.append(plant_id)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(parse_timestamp(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(parse_timestamp(end))
+        if risk is not None:
+            codes = [risk] if isinstance(risk, (str, int, np.integer)) else list(risk)
+            codes = sorted({risk_code(code) for code in codes})
+            clauses.append(f"risk IN ({', '.join('?' * len(codes))})")
+            params.extend(codes)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, plant=None, start=None, end=None, risk=None):
+        """Number of stored rows matching the filters"""
+        where, params = self._where(plant, start, end, risk)
+        if where is None:
+            return 0
+        return self.connection.execute(f"SELECT count(*) FROM results{where}", params).fetchone()[0]
+
+    def query(self, plant=None, start=None, end=None, risk=None, limit=None, inputs=False):
+        """Stored rows matching the filters, in timestamp order, as columns
+
+        start is inclusive and end exclusive, as epoch seconds, datetimes or
+        ISO-8601 strings; naive values are UTC (see
+        pollution_timeseries.parse_timestamp). risk is a label, a code or a
+        collection of either. Returns a dict of NumPy arrays keyed by
+        RESULT_COLUMNS (plus PARAMETER_KEYS when inputs is true), with plant
+        names and uint8 risk codes as used by pollution_batch.
+        """
+        fields = list(RESULT_COLUMNS) + (list(PARAMETER_KEYS) if inputs else [])
+        where, params = self._where(plant, start, end, risk)
+        rows = []
+        if where is not None:
+            sql = f"SELECT {', '.join(fields)} FROM results{where} ORDER BY timestamp, id"
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(int(limit))
+            rows = self.connection.execute(sql, params).fetchall()
+        return self._columns(fields, rows)
+
+    def _columns(self, fields, rows):
+        values = list(zip(*rows)) if rows else [()] * len(fields)
+        result = {}
+        for name, column in zip(fields, values):
+            if name == 'plant':
+                result[name] = np.array([self._plant_name(plant_id) for plant_id in column],
+                                        dtype=object)
+            elif name == 'aqi':
+                result[name] = np.array(column, dtype=np.int16)
+            elif name == 'risk':
+                result[name] = np.array(column, dtype=np.uint8)
+            else:
+                result[name] = np.array(column, dtype=np.float64)
+        return result
+
+    def top_days(self, n=10, plant=None, start=None, end=None, by='pm25_max'):
+        """The n worst plant-days, ranked by daily PM2.5 maximum, PM2.5 mean or AQI maximum
+
+        Reads only the daily rollup; start and end select the UTC days they
+        overlap, with naive values read as UTC (see
+        pollution_timeseries.parse_timestamp). Returns a list of dicts with
+        plant, date, rows, pm25_max, pm25_mean, aqi_max and the day's worst
+        risk label.
+        """
+        if by not in DAY_METRICS:
+            raise ValueError(f"Unknown ranking {by!r}; expected one of {', '.join(DAY_METRICS)}")
+        clauses = []
+        params = []
+        if plant is not None:
+            plant_id = self._plant_id(plant)
+            if plant_id is None:
+                return []
+            clauses.append("plant = ?")
+            params.append(plant_id)
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(int(parse_timestamp(start) // SECONDS_PER_DAY))
+        if end is not None:
+            clauses.append("day < ?")
+            params.append(int(-(-parse_timestamp(end) // SECONDS_PER_DAY)))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        params.append(int(n))
+        rows = self.connection.execute(
+            f"SELECT plant, day, rows, pm25_max, pm25_sum / rows, aqi_max, risk_max FROM daily"
+            f"{where} ORDER BY {DAY_METRICS[by]} DESC LIMIT ?", params).fetchall()
+        return [{
+            'plant': self._plant_name(plant_id),
+            'date': datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).date().isoformat(),
+            'rows': count,
+            'pm25_max': pm25_max,
+            'pm25_mean': pm25_mean,
+            'aqi_max': aqi_max,
+            'risk': RISK_LEVELS[risk_max][0]
+        } for plant_id, day, count, pm25_max, pm25_mean, aqi_max, risk_max in rows]
@@ -0,0 +1,199 @@
+"""
+Rolling Time-Series Aggregation
+
+Streaming aggregator for continuous furnace telemetry. Each sample is run
+through calculate_pollution/calculate_aqi once and pushed into ring
+buffers that keep running sums per window, so 1h/8h/24h averages update in
+O(1) amortized time per sample. A RiskTransition is emitted only when the
+assess_risk category of the tracked window changes.
+
+Timestamps without a time zone are read as UTC (see parse_timestamp), the
+same convention as the results store.
+"""
+
+import math
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS, PollutionEngine, parse_numeric
+
+# (name, length in seconds)
+WINDOWS = (('1h', 3600), ('8h', 8 * 3600), ('24h', 24 * 3600))
+
+FIELDS = POLLUTANTS + ('aqi',)
+
+RiskTransition = namedtuple('RiskTransition',
+                            'timestamp window previous current color aqi')
+
+
+class RingWindow:
+    """Time-bounded ring buffer of samples with running per-field sums
+
+    Samples older than `seconds` relative to the newest one are evicted
+    from the head. Storage starts at `capacity` slots and doubles when a
+    burst of samples fills it. Sums are recomputed from the stored samples
+    after every `capacity` evictions to keep floating-point drift bounded.
+    """
+
+    def __init__(self, seconds, capacity=1024):
+        self.seconds = seconds
+        self.capacity = max(2, int(capacity))
+        self.times = [0.0] * self.capacity
+        self.data = [[0.0] * self.capacity for _ in FIELDS]
+        self.sums = [0.0] * len(FIELDS)
+        self.head = 0
+        self.count = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, timestamp, sample):
+        """Add one sample (a sequence ordered like FIELDS) and evict stale ones"""
+        self._evict(timestamp - self.seconds)
+        if self.count == self.capacity:
+            self._grow()
+        slot = (self.head + self.count) % self.capacity
+        self.times[slot] = timestamp
+        for i, value in enumerate(sample):
+            self.data[i][slot] = value
+            self.sums[i] += value
+        self.count += 1
+
+    def means(self):
+        """Window average of each field, or None when empty"""
+        if not self.count:
+            return None
+        return {name: total / self.count for name, total in zip(FIELDS, self.sums)}
+
+    def _evict(self, cutoff):
+        while self.count and self.times[self.head] <= cutoff:
+            slot = self.head
+            for i, column in enumerate(self.data):
+                self.sums[i] -= column[slot]
+            self.head = (slot + 1) % self.capacity
+            self.count -= 1
+            self._evictions += 1
+        if self._evictions >= self.capacity:
+            self._resync()
+
+    def _slots(self):
+        return [(self.head + i) % self.capacity for i in range(self.count)]
+
+    def _resync(self):
+        slots = self._slots()
+        self.sums = [math.fsum(column[slot] for slot in slots) for column in self.data]
+        self._evictions = 0
+
+    def _grow(self):
+        slots = self._slots()
+        capacity = self.capacity * 2
+        self.times = [self.times[slot] for slot in slots] + [0.0] * (capacity - self.count)
+        self.data = [[column[slot] for slot in slots] + [0.0] * (capacity - self.count)
+                     for column in self.data]
+        self.capacity = capacity
+        self.head = 0
+
+
+class RollingAQIAggregator:
+    """Rolling pollutant and AQI averages over several time windows
+
+    `sample_interval` (seconds) sizes the ring buffers up front; irregular
+    telemetry still works because windows are bounded by timestamp. Risk
+    transitions follow the rolling AQI of `risk_window`, or the per-sample
+    AQI when it is None.
+    """
+
+    def __init__(self, windows=WINDOWS, sample_interval=1.0, risk_window='1h',
+                 engine=None):
+        self.engine = engine or PollutionEngine()
+        self.windows = {name: RingWindow(seconds, seconds / sample_interval + 1)
+                        for name, seconds in windows}
+        if risk_window is not None and risk_window not in self.windows:
+            raise ValueError(f"Unknown risk window: {risk_window}")
+        self.risk_window = risk_window
+        self.risk_code = None
+        self.risk_level = None
+        self.last_timestamp = None
+
+    def add(self, timestamp, values):
+        """Score one telemetry sample; returns a RiskTransition or None"""
+        pollution = self.engine.calculate_pollution(values)
+        return self.add_pollution(timestamp, pollution)
+
+    def add_pollution(self, timestamp, pollution, aqi=None):
+        """Add an already-scored sample; returns a RiskTransition or None"""
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Timestamps must not decrease: {timestamp} < {self.last_timestamp}")
+        self.last_timestamp = timestamp
+
+        if aqi is None:
+            aqi = self.engine.calculate_aqi(pollution)
+        sample = [pollution[name] for name in POLLUTANTS] + [aqi]
+        for window in self.windows.values():
+            window.push(timestamp, sample)
+
+        tracked = aqi if self.risk_window is None else self.rolling_aqi(self.risk_window)
+        code = self.engine.risk_code(tracked)
+        if code == self.risk_code:
+            return None
+
+        previous = self.risk_level
+        label, color = self.engine.assess_risk(tracked, pollution)
+        self.risk_code = code
+        self.risk_level = label
+        return RiskTransition(timestamp, self.risk_window, previous, label, color, tracked)
+
+    def rolling_aqi(self, window):
+        """Mean AQI over a window"""
+        ring = self.windows[window]
+        return ring.sums[-1] / ring.count if ring.count else 0.0
+
+    def averages(self, window):
+        """Mean pollutants and AQI over one window, plus its sample count"""
+        ring = self.windows[window]
+        means = ring.means()
+        if means is None:
+            return None
+        means['samples'] = ring.count
+        return means
+
+    def snapshot(self):
+        """Averages for every window keyed by window name"""
+        return {name: self.averages(name) for name in self.windows}
+
+
+def parse_timestamp(raw):
+    """Seconds since the epoch from a number, ISO-8601 string or datetime
+
+    Strings and datetimes without a time zone, including date-only strings,
+    are read as UTC, so results never depend on the host's time zone.
+    """
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        return float(raw)
+    if not isinstance(raw, datetime):
+        text = str(raw).strip()
+        try:
+            return float(text)
+        except ValueError:
+            raw = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if raw.tzinfo is None:
+        raw = raw.replace(tzinfo=timezone.utc)
+    return raw.timestamp()
+
+
+def iter_transitions(records, time_field='timestamp', aggregator=None):
+    """Feed telemetry records through an aggregator, yielding risk transitions
+
+    Records are mappings like those from pollution_io.iter_records; missing
+    or bad parameter cells are treated as 0.0, as in the GUI, and malformed
+    records (None) are skipped.
+    """
+    aggregator = aggregator or RollingAQIAggregator()
+    for record in records:
+        if record is None:
+            continue
+        values = {key: parse_numeric(record.get(key)) for key in PARAMETER_KEYS}
+        transition = aggregator.add(parse_timestamp(record[time_field]), values)
+        if transition is not None:
+            yield transition
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pollution_engine import PARAMETER_KEYS, PARAMETERS, POLLUTANTS, PollutionEngine  # noqa: E402
+
+
+def random_columns(rows, seed=0):
+    """Columns drawn uniformly within the bounds declared in PARAMETERS"""
+    rng = np.random.default_rng(seed)
+    return {key: rng.uniform(low, high, rows) for _, key, low, high in PARAMETERS}
+
+
+def scalar_results(columns, profile=None):
+    """(values, pollution, aqi, risk code) per row from the scalar engine"""
+    engine = PollutionEngine(profile)
+    rows = []
+    for i in range(len(columns[PARAMETER_KEYS[0]])):
+        values = {key: float(columns[key][i]) for key in PARAMETER_KEYS}
+        pollution = engine.calculate_pollution(values)
+        aqi = engine.calculate_aqi(pollution)
+        rows.append((values, pollution, aqi, engine.risk_code(aqi)))
+    return rows
+
+
+def assert_pollution_matches(expected, pollution):
+    for i, (_, scalar_pollution, _, _) in enumerate(expected):
+        for name in POLLUTANTS:
+            assert pollution[name][i] == scalar_pollution[name], (i, name)
+
+
+def assert_matches(expected, pollution, aqi, risk):
+    assert_pollution_matches(expected, pollution)
+    for i, (_, _, scalar_aqi, scalar_risk) in enumerate(expected):
+        assert aqi[i] == scalar_aqi, i
+        assert risk[i] == scalar_risk, i
+
+
+@pytest.fixture
+def columns():
+    return random_columns(2000, seed=7)
@@ -0,0 +1,37 @@
+"""Batch scoring must match the scalar engine bit for bit"""
+
+import numpy as np
+
+from conftest import assert_matches, assert_pollution_matches, random_columns, scalar_results
+from pollution_batch import (READING_DTYPE, calculate_pollution_batch, recommendation_keys_batch,
+                             score_batch, score_records)
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS, recommendation_key
+
+
+def test_calculate_pollution_batch_matches_engine(columns):
+    assert_pollution_matches(scalar_results(columns), calculate_pollution_batch(columns))
+
+
+def test_score_batch_matches_engine(columns):
+    assert_matches(scalar_results(columns), *score_batch(columns))
+
+
+def test_recommendation_keys_match_engine(columns):
+    pollution, aqi, _ = score_batch(columns)
+    keys = recommendation_keys_batch(columns, pollution, aqi)
+    for i, (values, scalar_pollution, scalar_aqi, _) in enumerate(scalar_results(columns)):
+        assert keys[i] == recommendation_key(values, scalar_pollution, scalar_aqi), i
+
+
+def test_score_records_matches_engine_in_float32():
+    columns = random_columns(500, seed=3)
+    readings = np.empty(500, dtype=READING_DTYPE)
+    for key in PARAMETER_KEYS:
+        readings[key] = columns[key]
+    results = score_records(readings)
+    expected = scalar_results({key: readings[key] for key in PARAMETER_KEYS})
+    for i, (_, pollution, aqi, risk) in enumerate(expected):
+        for name in POLLUTANTS:
+            assert results[name][i] == np.float32(pollution[name]), (i, name)
+        assert results['aqi'][i] == aqi
+        assert results['risk'][i] == risk
@@ -0,0 +1,37 @@
+"""Benchmark report comparison"""
+
+from pollution_bench import best_of_reports, compare
+
+
+def report(**metrics):
+    return {'meta': {}, 'results': {
+        name: dict({'unit': 'ns', 'better': 'lower', 'noise': 0.0}, **metric)
+        for name, metric in metrics.items()}}
+
+
+def test_compare_uses_reference_units_when_both_reports_have_them():
+    baseline = report(call={'value': 100.0, 'relative': 1.0})
+    # Twice the wall time on a machine running at half speed is no regression
+    assert compare(report(call={'value': 200.0, 'relative': 1.05}), baseline) == []
+    regressions = compare(report(call={'value': 100.0, 'relative': 1.5}), baseline)
+    assert [name for name, *_ in regressions] == ['call']
+
+
+def test_compare_allows_measured_noise():
+    baseline = report(call={'value': 100.0, 'noise': 0.2})
+    assert compare(report(call={'value': 125.0}), baseline) == []
+    assert compare(report(call={'value': 135.0}), baseline)
+
+
+def test_compare_higher_is_better():
+    baseline = report(rate={'value': 100.0, 'better': 'higher'})
+    assert compare(report(rate={'value': 120.0, 'better': 'higher'}), baseline) == []
+    assert compare(report(rate={'value': 80.0, 'better': 'higher'}), baseline)
+
+
+def test_best_of_reports_keeps_the_favourable_result():
+    merged = best_of_reports([
+        report(call={'value': 120.0}, rate={'value': 50.0, 'better': 'higher'}),
+        report(call={'value': 100.0}, rate={'value': 40.0, 'better': 'higher'})])
+    assert merged['results']['call']['value'] == 100.0
+    assert merged['results']['rate']['value'] == 50.0
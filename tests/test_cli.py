@@ -0,0 +1,17 @@
+"""Command-line entry point: exit codes and error messages"""
+
+import pytest
+
+from pollution_cli import main
+
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+def test_missing_input_is_an_error_not_a_traceback(tmp_path, capsys, workers):
+    assert main([str(tmp_path / 'missing.csv'), '-o', str(tmp_path / 'out.csv'),
+                 '-j', workers]) == 1
+    assert capsys.readouterr().err.startswith('error: ')
+
+
+def test_bad_options_exit_with_usage_code(tmp_path, capsys):
+    assert main([str(tmp_path / 'in.csv'), '--chunk-size', '0']) == 2
+    assert 'chunk-size' in capsys.readouterr().err
@@ -0,0 +1,73 @@
+"""Result writers: binary round trips, text formatting and aborted exports"""
+
+import io
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import random_columns
+from pollution_batch import score_batch
+from pollution_engine import POLLUTANTS, RISK_LEVELS
+from pollution_export import (RESULT_DTYPES, JsonlResultWriter, NpyResultWriter,
+                              open_result_writer)
+
+
+@pytest.fixture
+def scored():
+    return score_batch(random_columns(300, seed=11))
+
+
+def write_in_chunks(writer, scored, size=64):
+    pollution, aqi, risk = scored
+    for start in range(0, len(aqi), size):
+        part = {name: pollution[name][start:start + size] for name in POLLUTANTS}
+        writer.write_chunk(start, part, aqi[start:start + size], risk[start:start + size])
+
+
+def check_columns(columns, scored):
+    pollution, aqi, risk = scored
+    assert np.array_equal(columns['row'], np.arange(len(aqi)))
+    for name in POLLUTANTS:
+        assert np.array_equal(columns[name], pollution[name])
+    assert np.array_equal(columns['aqi'], aqi)
+    assert np.array_equal(columns['risk'], risk)
+    for name, dtype in RESULT_DTYPES:
+        assert columns[name].dtype == dtype
+
+
+def test_npz_round_trip(tmp_path, scored):
+    path = tmp_path / 'out.npz'
+    with open_result_writer(str(path), 'npz') as writer:
+        write_in_chunks(writer, scored)
+    with np.load(path) as archive:
+        check_columns({name: archive[name] for name, _ in RESULT_DTYPES}, scored)
+
+
+def test_npy_directory_round_trip(tmp_path, scored):
+    path = tmp_path / 'out'
+    with open_result_writer(str(path), 'npy') as writer:
+        write_in_chunks(writer, scored)
+    check_columns({name: np.load(path / (name + '.npy')) for name, _ in RESULT_DTYPES}, scored)
+
+
+@pytest.mark.parametrize('name', ['out.npz', 'out'])
+def test_aborted_export_leaves_no_partial_output(tmp_path, scored, name):
+    path = tmp_path / name
+    with pytest.raises(RuntimeError):
+        with NpyResultWriter(str(path)) as writer:
+            write_in_chunks(writer, scored)
+            raise RuntimeError("scoring failed")
+    assert not os.path.isdir(writer.directory) or not os.listdir(writer.directory)
+    assert not path.is_file()
+
+
+def test_jsonl_rows_match_json_dumps(scored):
+    handle = io.StringIO()
+    write_in_chunks(JsonlResultWriter(handle), scored)
+    pollution, aqi, risk = scored
+    for i, line in enumerate(handle.getvalue().splitlines()):
+        expected = {'row': i, **{name: float(pollution[name][i]) for name in POLLUTANTS},
+                    'aqi': int(aqi[i]), 'risk': RISK_LEVELS[risk[i]][0]}
+        assert line == json.dumps(expected)
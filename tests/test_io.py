@@ -0,0 +1,58 @@
+"""Streaming ingestion: parse statistics and input row numbering"""
+
+import io
+import json
+
+import pytest
+
+from pollution_engine import PARAMETER_KEYS
+from pollution_io import ParseStats, iter_chunks, iter_records, run_pipeline
+
+GOOD = dict(zip(PARAMETER_KEYS, (900, 1300, 500, 70, 80, 8, 5, 5, 0.6, 40)))
+
+
+def jsonl(lines):
+    return io.StringIO(''.join(line + '\n' for line in lines))
+
+
+def test_bad_cells_are_counted_per_column():
+    text = ','.join(PARAMETER_KEYS) + '\n' + ','.join(['x'] + ['1'] * 9) + '\n'
+    stats = ParseStats()
+    chunks = list(iter_chunks(iter_records(io.StringIO(text), 'csv'), stats=stats))
+    assert stats.rows == 1
+    assert stats.bad_cells == 1
+    assert stats.bad_by_column['production'] == 1
+    assert chunks[0].columns['production'][0] == 0.0
+
+
+def test_malformed_jsonl_lines_are_counted_and_zeroed():
+    lines = [json.dumps(GOOD), '{broken', '[1, 2]', '', json.dumps(GOOD)]
+    stats = ParseStats()
+    chunks = list(iter_chunks(iter_records(jsonl(lines), 'jsonl'), stats=stats))
+    assert stats.rows == 4
+    assert stats.malformed_rows == 2
+    assert stats.skipped_rows == 0
+    assert chunks[0].rows.tolist() == [0, 1, 2, 3]
+    assert chunks[0].columns['fuel'].tolist() == [500, 0, 0, 500]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 100])
+def test_skipped_rows_keep_their_input_row_numbers(chunk_size):
+    bad = dict(GOOD, fuel='n/a')
+    lines = [json.dumps(bad), json.dumps(GOOD), '{broken', json.dumps(GOOD), json.dumps(bad)]
+    stats = ParseStats()
+    chunks = iter_chunks(iter_records(jsonl(lines), 'jsonl'), chunk_size, stats, 'skip')
+    assert [row for chunk in chunks for row in chunk.rows.tolist()] == [1, 3]
+    assert stats.skipped_rows == 3
+    assert stats.malformed_rows == 1
+
+
+def test_pipeline_writes_input_row_numbers(tmp_path):
+    source = tmp_path / 'input.jsonl'
+    source.write_text('\n'.join(['{broken', json.dumps(GOOD), '{', json.dumps(GOOD)]) + '\n',
+                      encoding='utf-8')
+    destination = tmp_path / 'scored.csv'
+    written, stats = run_pipeline(str(source), str(destination), chunk_size=1, on_error='skip')
+    assert written == 2
+    rows = [line.split(',')[0] for line in destination.read_text().splitlines()[1:]]
+    assert rows == ['1', '3']
@@ -0,0 +1,116 @@
+"""Inverse optimizer: feasibility, cost accounting and the solution cache"""
+
+import numpy as np
+import pytest
+
+from conftest import random_columns
+from pollution_batch import aqi_raw_batch, calculate_pollution_batch
+from pollution_optimizer import CONTROLLED, LEVERS, InverseSolver, target_for_risk
+from pollution_profiles import DEFAULT_PROFILE
+from pollution_scenarios import BOUNDS
+
+THRESHOLD = DEFAULT_PROFILE.coefficients.maintenance_threshold
+
+
+@pytest.fixture
+def plants():
+    # Lighter loads than the full PARAMETERS ranges, so some plants can reach the target
+    columns = random_columns(1000, seed=31)
+    columns['production'] *= 0.3
+    columns['fuel'] *= 0.5
+    return columns
+
+
+def best_effort(columns):
+    """Every lever pushed to its AQI-lowering bound and maintenance upgraded"""
+    rows = len(columns['maintenance'])
+    settings = {key: np.full(rows, BOUNDS[key][1] if direction > 0 else BOUNDS[key][0])
+                for key, direction in LEVERS}
+    settings['maintenance'] = np.where(columns['maintenance'] > THRESHOLD,
+                                       columns['maintenance'], 1.0)
+    return dict(columns, **settings)
+
+
+def aqi_raw(columns):
+    return aqi_raw_batch(calculate_pollution_batch(columns))
+
+
+def test_solutions_meet_the_target_and_infeasible_plants_are_flagged(plants):
+    solution = InverseSolver(100).solve(plants)
+    feasible = solution.feasible
+    assert 0 < feasible.mean() < 1
+    assert (aqi_raw(dict(plants, **solution.settings))[feasible] < 100).all()
+    assert (solution.aqi[feasible] < 100).all()
+    # A plant is infeasible exactly when even the best effort misses the target
+    assert np.array_equal(feasible, aqi_raw(best_effort(plants)) < 100)
+
+    already = aqi_raw(plants) < 100
+    assert (solution.cost[already] == 0).all()
+
+
+def test_settings_stay_in_bounds_and_cost_is_the_relative_change(plants):
+    solution = InverseSolver(100).solve(plants)
+    cost = np.zeros(len(solution))
+    for key in CONTROLLED:
+        low, high = BOUNDS[key]
+        settings = solution.settings[key]
+        assert ((settings >= low) & (settings <= high)).all()
+        cost += np.abs(settings - plants[key]) / (high - low)
+    for key, direction in LEVERS:
+        assert (direction * (solution.settings[key] - plants[key]) >= 0).all()
+    feasible = solution.feasible
+    assert solution.cost[feasible] == pytest.approx(cost[feasible], abs=1e-9)
+
+
+def test_no_random_setting_is_cheaper(plants):
+    solver = InverseSolver(100)
+    solution = solver.solve(plants)
+    rng = np.random.default_rng(5)
+    samples = 20000
+    checked = 0
+    for i in np.flatnonzero(solution.feasible & (solution.cost > 0))[:20]:
+        trial = {key: np.full(samples, plants[key][i]) for key in plants}
+        for key, direction in LEVERS:
+            low, high = BOUNDS[key]
+            bound = high if direction > 0 else low
+            trial[key] = rng.uniform(*sorted((plants[key][i], bound)), samples)
+        upgrade = rng.random(samples) < 0.5
+        if plants['maintenance'][i] <= THRESHOLD:
+            trial['maintenance'] = np.where(upgrade, solver.maintenance_target,
+                                            plants['maintenance'][i])
+        ok = aqi_raw(trial) < 100
+        cost = sum(np.abs(trial[key] - plants[key][i]) / (BOUNDS[key][1] - BOUNDS[key][0])
+                   for key in CONTROLLED)
+        if ok.any():
+            checked += 1
+            assert cost[ok].min() >= solution.cost[i] - 1e-6, i
+    assert checked > 10
+
+
+def test_repeated_states_are_answered_from_the_cache(plants):
+    solver = InverseSolver(100)
+    first = solver.solve(plants)
+    assert (solver.hits, solver.misses) == (0, 1000)
+    second = solver.solve(plants)
+    assert (solver.hits, solver.misses) == (1000, 1000)
+    assert np.array_equal(first.cost, second.cost)
+    assert np.array_equal(first.feasible, second.feasible)
+    for key in CONTROLLED:
+        assert np.array_equal(first.settings[key], second.settings[key])
+
+
+def test_warm_start_and_single_plant_agree_with_a_cold_solve(plants):
+    cold = InverseSolver(100).solve(plants)
+    warm = InverseSolver(100).solve(plants, warm_start=cold.settings)
+    assert np.array_equal(warm.feasible, cold.feasible)
+    assert warm.cost == pytest.approx(cold.cost, abs=1e-6)
+
+    i = int(np.flatnonzero(cold.feasible & (cold.cost > 0))[0])
+    row = InverseSolver(100).solve_one({key: float(values[i]) for key, values in plants.items()})
+    assert row['feasible'] and row['aqi'] < 100
+    assert row['cost'] == pytest.approx(cold.cost[i], abs=1e-9)
+
+
+def test_risk_level_targets():
+    assert target_for_risk('LOW') == 50
+    assert InverseSolver('MODERATE').target == 100
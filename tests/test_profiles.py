@@ -0,0 +1,53 @@
+"""Emission-factor profiles: validation and identical scalar/batch results"""
+
+import json
+
+import numpy as np
+import pytest
+
+from conftest import assert_matches, scalar_results
+from pollution_batch import score_batch, score_fleet_batch
+from pollution_profiles import DEFAULT_PROFILE, ProfileError, compile_profile, load_profile
+
+ARC = compile_profile({'base': {'pm25': 11.0}, 'temperature': {'knee': 1500},
+                       'maintenance': {'threshold': 0.4, 'impact': 0.6}}, name='arc')
+
+
+def test_overrides_keep_other_defaults():
+    assert ARC.coefficients.base_pm25 == 11.0
+    assert ARC.coefficients.base_so2 == DEFAULT_PROFILE.coefficients.base_so2
+
+
+@pytest.mark.parametrize('data', [
+    {'nope': {'pm25': 1.0}},
+    {'base': {'nope': 1.0}},
+    {'base': {'pm25': -1.0}},
+    {'base': {'pm25': 'high'}},
+    {'production': {'scale': 0}},
+    {'maintenance': {'impact': 1.5}},
+    {'experience': {'floor': 2.0}},
+])
+def test_invalid_profiles_raise(data):
+    with pytest.raises(ProfileError):
+        compile_profile(data, name='bad')
+
+
+def test_load_profile_names_from_file_stem(tmp_path):
+    path = tmp_path / 'arc.json'
+    path.write_text(json.dumps({'base': {'pm25': 11.0}}), encoding='utf-8')
+    profile = load_profile(path)
+    assert profile.name == 'arc'
+    assert profile.coefficients.base_pm25 == 11.0
+
+
+def test_score_batch_matches_engine_with_profile(columns):
+    assert_matches(scalar_results(columns, ARC), *score_batch(columns, ARC))
+
+
+def test_score_fleet_batch_matches_per_row_profile(columns):
+    profiles = {'default': DEFAULT_PROFILE, 'arc': ARC}
+    ids = np.where(np.arange(len(columns['fuel'])) % 3, 'default', 'arc')
+    pollution, aqi, risk = score_fleet_batch(columns, ids, profiles)
+    expected = {name: scalar_results(columns, profile) for name, profile in profiles.items()}
+    mixed = [expected[name][i] for i, name in enumerate(ids.tolist())]
+    assert_matches(mixed, pollution, aqi, risk)
@@ -0,0 +1,42 @@
+"""Recommendation text must stay identical to the original GUI output"""
+
+import hashlib
+
+from pollution_engine import (REC_CARBON, REC_HIGH_FUEL, REC_KEY_COUNT, REC_LOW_EFFICIENCY,
+                              REC_LOW_QUALITY, REC_POOR_MAINTENANCE, RECOMMENDATION_TEXTS,
+                              PollutionEngine, recommendation_key)
+
+# SHA-256 of the 32 reports produced by the original generate_recommendations,
+# one per key, joined with "\n\0"
+REPORTS_SHA256 = '0688f53cc2f248501c74a16c220926c55f4c6485bc17a927beb5326a0742bd1a'
+
+
+def inputs_for(key):
+    """(values, pollution, aqi) that trigger exactly the blocks in key"""
+    values = {'fuel': 1200.0 if key & REC_HIGH_FUEL else 800.0,
+              'efficiency': 80.0 if key & REC_LOW_EFFICIENCY else 90.0,
+              'quality': 70.0 if key & REC_LOW_QUALITY else 90.0,
+              'maintenance': 0.3 if key & REC_POOR_MAINTENANCE else 0.8}
+    pollution = {'pm25': 1.0, 'so2': 1.0, 'nox': 1.0, 'co': 6.0 if key & REC_CARBON else 1.0}
+    return values, pollution, 50
+
+
+def test_reports_match_original_text():
+    engine = PollutionEngine()
+    texts = ["\n".join(engine.generate_recommendations(*inputs_for(key)))
+             for key in range(REC_KEY_COUNT)]
+    assert texts == list(RECOMMENDATION_TEXTS)
+    digest = hashlib.sha256("\n\0".join(texts).encode()).hexdigest()
+    assert digest == REPORTS_SHA256
+
+
+def test_recommendation_key_bits():
+    for key in range(REC_KEY_COUNT):
+        assert recommendation_key(*inputs_for(key)) == key
+
+
+def test_carbon_block_on_high_aqi():
+    values, pollution, _ = inputs_for(0)
+    assert recommendation_key(values, pollution, 101) == REC_CARBON
+    assert "♻️ CARBON MANAGEMENT SOLUTIONS:" in PollutionEngine().generate_recommendations(
+        values, pollution, 101)
@@ -0,0 +1,64 @@
+"""Scenario sweeps and AQI sensitivities against the batch model"""
+
+import numpy as np
+import pytest
+
+from conftest import random_columns
+from pollution_batch import aqi_raw_batch, calculate_pollution_batch
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS
+from pollution_profiles import DEFAULT_PROFILE
+from pollution_scenarios import default_values, finite_difference, sensitivities, sweep
+
+
+def grid_columns(axes, base):
+    """Row-per-point columns of the full Cartesian grid, built the brute-force way"""
+    mesh = np.meshgrid(*axes.values(), indexing='ij')
+    rows = mesh[0].size
+    columns = {key: np.full(rows, float(value)) for key, value in base.items()}
+    for key, values in zip(axes, mesh):
+        columns[key] = values.ravel()
+    return columns, mesh[0].shape
+
+
+def test_sweep_matches_pointwise_evaluation():
+    base = dict(default_values(), maintenance=0.3, experience=4.0)
+    axes = {'temperature': np.linspace(0, 2000, 41), 'fuel': np.linspace(0, 5000, 26),
+            'efficiency': np.array([20.0, 60.0, 95.0])}
+    result = sweep(axes, base)
+    columns, shape = grid_columns(axes, base)
+    pollution = calculate_pollution_batch(columns)
+    assert result.shape == shape
+    for name in POLLUTANTS:
+        assert np.array_equal(result.pollution[name], pollution[name].reshape(shape))
+    aqi = aqi_raw_batch(pollution).astype(np.int16).reshape(shape)
+    assert np.array_equal(result.aqi, aqi)
+
+    point, lowest = result.lowest_aqi()
+    assert lowest == aqi.min()
+    assert result.below(lowest + 1).any() and not result.below(lowest).any()
+    assert set(point) == set(axes)
+
+
+def test_sweep_accepts_start_stop_num_and_rejects_unknown_parameters():
+    result = sweep({'temperature': (0, 2000, 2001)})
+    assert result.shape == (2001,)
+    assert np.array_equal(result.axes['temperature'], np.linspace(0, 2000, 2001))
+    with pytest.raises(KeyError):
+        sweep({'pressure': (0, 1, 2)})
+
+
+def test_sensitivities_match_finite_differences_away_from_knees():
+    columns = random_columns(5000, seed=21)
+    analytic = sensitivities(columns)
+    numeric = finite_difference(columns)
+    c = DEFAULT_PROFILE.coefficients
+    raw = aqi_raw_batch(calculate_pollution_batch(columns))
+    smooth = ((np.abs(columns['temperature'] - c.temperature_knee) > 1) &
+              (np.abs(columns['maintenance'] - c.maintenance_threshold) > 1e-3) &
+              (raw > 1e-3) & (np.abs(raw - 500) > 1e-3))
+    assert smooth.mean() > 0.8
+    for key in PARAMETER_KEYS:
+        assert analytic[key][smooth] == pytest.approx(numeric[key][smooth], rel=1e-6, abs=1e-8)
+    for key in ('hours', 'age', 'humidity', 'maintenance'):
+        assert not analytic[key].any()
+
@@ -0,0 +1,85 @@
+"""Scoring service: concurrent clients, micro-batching and the result cache"""
+
+import asyncio
+
+from conftest import random_columns, scalar_results
+from pollution_engine import PARAMETER_KEYS, RISK_LEVELS
+from pollution_service import ScoringService, ServiceClient, start_server
+
+
+def readings(rows, seed):
+    columns = random_columns(rows, seed)
+    return [{key: float(columns[key][i]) for key in PARAMETER_KEYS} for i in range(rows)]
+
+
+def expected_result(reading):
+    ((_, pollution, aqi, code),) = scalar_results({key: [reading[key]] for key in PARAMETER_KEYS})
+    return dict(pollution, aqi=aqi, risk=RISK_LEVELS[code][0])
+
+
+def serve(service, session):
+    """Run session(client_factory) against a server on a free port"""
+    async def main():
+        service_, server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        clients = []
+
+        def client():
+            clients.append(ServiceClient(port=port))
+            return clients[-1]
+        try:
+            return await session(client)
+        finally:
+            for c in clients:
+                await c.close()
+            server.close()
+            await server.wait_closed()
+            await service_.stop()
+    return asyncio.run(main())
+
+
+def test_concurrent_clients_match_engine_in_shared_batches():
+    service = ScoringService(max_batch=8, max_delay=0.02, quantum=0)
+    requests = [readings(5, seed) for seed in range(20)]
+
+    async def session(client):
+        return await asyncio.gather(*(client().score(request) for request in requests))
+
+    results = serve(service, session)
+    for request, result in zip(requests, results):
+        assert result == [expected_result(reading) for reading in request]
+    stats = service.stats()
+    assert stats['cache']['misses'] == 100
+    assert stats['largest_batch'] == 8
+    assert stats['mean_batch_rows'] > 1
+
+
+def test_repeated_reading_is_a_cache_hit():
+    service = ScoringService(quantum=0)
+    reading = readings(1, seed=3)[0]
+
+    async def session(client):
+        c = client()
+        return await c.score(reading), await c.score(reading)
+
+    first, second = serve(service, session)
+    assert first == second == expected_result(reading)
+    assert service.hits == 1 and service.misses == 1
+
+
+def test_cache_key_keeps_threshold_sides_apart():
+    # Both readings round to the same cell, but lie either side of the maintenance step
+    service = ScoringService(quantum=0.01)
+    below, above = readings(1, seed=5) * 2
+    below = dict(below, maintenance=0.4996)
+    above = dict(above, maintenance=0.5004)
+
+    async def session(client):
+        c = client()
+        return await c.score(below), await c.score(above)
+
+    scored_below, scored_above = serve(service, session)
+    assert service.hits == 0 and service.misses == 2
+    assert scored_below == expected_result(below)
+    assert scored_above == expected_result(above)
+    assert scored_below != scored_above
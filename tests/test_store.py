@@ -0,0 +1,65 @@
+"""Results store: filtered queries, counts and daily rollups"""
+
+import numpy as np
+import pytest
+
+from conftest import random_columns
+from pollution_batch import score_batch
+from pollution_engine import RISK_LEVELS
+from pollution_store import SECONDS_PER_DAY, ResultStore
+
+START = 1714521600  # 2024-05-01T00:00:00Z
+ROWS = 240
+
+
+@pytest.fixture
+def store(tmp_path):
+    columns = random_columns(ROWS, seed=5)
+    # One reading per plant every two hours over ten days
+    times = START + np.arange(ROWS) // 2 * 3600 * 2.0
+    plants = np.where(np.arange(ROWS) % 2, 'east', 'west')
+    with ResultStore(tmp_path / 'results.db') as store:
+        store.append_readings(plants, times, columns)
+        yield store, columns, times, plants
+
+
+def test_query_filters_match_numpy(store):
+    store, columns, times, plants = store
+    pollution, aqi, risk = score_batch(columns)
+    mask = ((plants == 'east') & (times >= START + SECONDS_PER_DAY) &
+            (times < START + 3 * SECONDS_PER_DAY))
+    result = store.query(plant='east', start='2024-05-02', end='2024-05-04', inputs=True)
+    assert result['timestamp'].tolist() == times[mask].tolist()
+    assert result['pm25'].tolist() == pollution['pm25'][mask].tolist()
+    assert result['aqi'].tolist() == aqi[mask].tolist()
+    assert result['fuel'].tolist() == columns['fuel'][mask].tolist()
+    assert store.count(plant='east', start='2024-05-02', end='2024-05-04') == mask.sum()
+
+
+def test_risk_filter_accepts_labels_and_codes(store):
+    store, columns, _, _ = store
+    _, _, risk = score_batch(columns)
+    label = RISK_LEVELS[int(risk[0])][0]
+    assert store.count(risk=label) == (risk == risk[0]).sum()
+    assert store.count(risk=[int(risk[0]), label]) == (risk == risk[0]).sum()
+    assert store.count(plant='nowhere') == 0
+    assert len(store.query(plant='nowhere')['aqi']) == 0
+
+
+def test_top_days_ranks_daily_pm25_maxima(store):
+    store, columns, times, plants = store
+    pollution, _, _ = score_batch(columns)
+    days = (times // SECONDS_PER_DAY).astype(int)
+    expected = {}
+    for plant, day, pm25 in zip(plants.tolist(), days.tolist(), pollution['pm25'].tolist()):
+        expected[plant, day] = max(expected.get((plant, day), 0.0), pm25)
+    best = sorted(expected.values(), reverse=True)[:3]
+    top = store.top_days(3)
+    assert [day['pm25_max'] for day in top] == best
+    assert all('2024-05-01' <= day['date'] <= '2024-05-10' for day in top)
+    assert {day['date'] for day in store.top_days(10, start='2024-05-10')} == {'2024-05-10'}
+
+
+def test_naive_timestamps_are_utc(store):
+    store, _, _, _ = store
+    assert store.count(end='2024-05-01T02:00:00') == store.count(end=START + 7200)
@@ -0,0 +1,104 @@
+"""Rolling windows and risk transitions against brute-force recomputation"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from conftest import random_columns
+from pollution_engine import PARAMETER_KEYS, POLLUTANTS, PollutionEngine
+from pollution_timeseries import (FIELDS, RingWindow, RollingAQIAggregator, iter_transitions,
+                                  parse_timestamp)
+
+
+def telemetry(rows, seed=0):
+    """Irregular timestamps, with bursts that overflow the preallocated rings
+
+    Production and fuel follow a slow load cycle so that rolling AQI moves
+    through several risk levels.
+    """
+    rng = np.random.default_rng(seed)
+    gaps = rng.choice([0.0, 0.5, 1.0, 30.0, 900.0], size=rows, p=[0.2, 0.3, 0.3, 0.15, 0.05])
+    times = np.cumsum(gaps)
+    columns = random_columns(rows, seed)
+    load = 0.5 - 0.5 * np.cos(2 * np.pi * times / 20000)
+    columns['production'] *= load
+    columns['fuel'] *= load
+    samples = [{key: float(columns[key][i]) for key in PARAMETER_KEYS} for i in range(rows)]
+    return times.tolist(), samples
+
+
+def test_ring_window_matches_brute_force_means():
+    rng = np.random.default_rng(1)
+    times = np.cumsum(rng.uniform(0, 3, 5000)).tolist()
+    values = rng.uniform(0, 500, (5000, len(FIELDS)))
+    ring = RingWindow(60, capacity=4)
+    for i, timestamp in enumerate(times):
+        ring.push(timestamp, values[i].tolist())
+        inside = [j for j in range(i + 1) if times[j] > timestamp - 60]
+        expected = values[inside].mean(axis=0)
+        assert len(ring) == len(inside)
+        assert list(ring.means().values()) == pytest.approx(expected, rel=1e-9)
+
+
+def test_aggregator_windows_match_brute_force():
+    times, samples = telemetry(3000, seed=2)
+    windows = (('1m', 60), ('1h', 3600))
+    aggregator = RollingAQIAggregator(windows=windows, sample_interval=5.0, risk_window=None)
+    engine = PollutionEngine()
+    scored = []
+    for timestamp, values in zip(times, samples):
+        aggregator.add(timestamp, values)
+        pollution = engine.calculate_pollution(values)
+        scored.append([pollution[name] for name in POLLUTANTS] + [engine.calculate_aqi(pollution)])
+    scored = np.array(scored)
+
+    end = times[-1]
+    for name, seconds in windows:
+        inside = [i for i, timestamp in enumerate(times) if timestamp > end - seconds]
+        averages = aggregator.averages(name)
+        assert averages['samples'] == len(inside)
+        expected = scored[inside].mean(axis=0)
+        assert [averages[field] for field in FIELDS] == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize('risk_window', [None, '1h'])
+def test_transitions_only_when_the_risk_level_changes(risk_window):
+    times, samples = telemetry(2000, seed=3)
+    aggregator = RollingAQIAggregator(risk_window=risk_window)
+    engine = PollutionEngine()
+    transitions = [aggregator.add(timestamp, values) for timestamp, values in zip(times, samples)]
+
+    aqi = [engine.calculate_aqi(engine.calculate_pollution(values)) for values in samples]
+    codes = []
+    for i, timestamp in enumerate(times):
+        if risk_window is None:
+            codes.append(engine.risk_code(aqi[i]))
+        else:
+            inside = [aqi[j] for j in range(i + 1) if times[j] > timestamp - 3600]
+            codes.append(engine.risk_code(sum(inside) / len(inside)))
+    for i, transition in enumerate(transitions):
+        changed = i == 0 or codes[i] != codes[i - 1]
+        assert (transition is not None) == changed, i
+    emitted = [t for t in transitions if t is not None]
+    assert len(emitted) > 1
+    assert all(a.current == b.previous for a, b in zip(emitted, emitted[1:]))
+    assert emitted[0].previous is None
+
+
+def test_decreasing_timestamps_are_rejected():
+    aggregator = RollingAQIAggregator()
+    values = dict.fromkeys(PARAMETER_KEYS, 1.0)
+    aggregator.add(100.0, values)
+    with pytest.raises(ValueError):
+        aggregator.add(99.0, values)
+
+
+def test_iter_transitions_reads_naive_timestamps_as_utc():
+    _, samples = telemetry(200, seed=4)
+    start = datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp()
+    naive = [dict(values, timestamp=datetime.fromtimestamp(start + 60 * i, timezone.utc)
+                  .replace(tzinfo=None).isoformat()) for i, values in enumerate(samples)]
+    numeric = [dict(values, timestamp=start + 60 * i) for i, values in enumerate(samples)]
+    assert list(iter_transitions(naive)) == list(iter_transitions(numeric))
+    assert parse_timestamp('2024-05-01') == parse_timestamp('2024-05-01T00:00:00Z') == start